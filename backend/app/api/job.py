@@ -4,6 +4,7 @@ from app.database import get_db
 from app.models.jobs import Job
 from app.schemas.mailer import MailerJobCreate, MailerJobOut, MailerJobUpdate
 from app.utils.responses import send_status_response
+from app.core.scheduling import refresh_next_run_at
 
 from app.utils.security import authenticated_user, ensure_is_owner, not_found_response
 from app.models.user import User
@@ -17,6 +18,7 @@ def create_mailer_job(
     user: User = Depends(authenticated_user)
 ):
     job = Job(**data.dict(), user_id=user.id)
+    refresh_next_run_at(job)
     db.add(job)
     db.commit()
     db.refresh(job)
@@ -77,6 +79,7 @@ def update_mailer_job(
 
     for key, value in data.dict().items():
         setattr(job, key, value)
+    refresh_next_run_at(job)
     db.commit()
     db.refresh(job)
     return job
@@ -94,6 +97,7 @@ def update_mailer_job(
     ensure_is_owner(job.user_id, user)
     
     job.is_active = not job.is_active
+    refresh_next_run_at(job)
     db.commit()
     db.refresh(job)
 
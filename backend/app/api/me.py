@@ -7,7 +7,7 @@ from app.utils.responses import send_status_response
 from app.utils.crypto import verify_password, hash_password
 import re
 
-from app.utils.security import authenticated_user, ensure_is_owner, not_found_response
+from app.utils.security import authenticated_user, ensure_is_owner, not_found_response, invalidate_user_cache
 from app.models.user import User
 
 router = APIRouter(prefix="/me", tags=["me"])
@@ -34,6 +34,7 @@ def update_me(
     for key, value in data.dict(exclude_unset=True).items():
         setattr(me, key, value)
     db.commit()
+    invalidate_user_cache(me.id)
     db.refresh(me)
     return me
 
@@ -75,5 +76,6 @@ def update_password(
     user.is_initial_password = False
     db.add(user)
     db.commit()
+    invalidate_user_cache(user.id)
 
     return {"success": True}
\ No newline at end of file
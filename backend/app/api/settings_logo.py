@@ -5,6 +5,7 @@ from pydantic import BaseModel
 from app.database import get_db
 from app.models.system_settings import SystemSettings
 from app.services.files import save_logo_image, delete_file_if_exists
+from app.core.logo_assets import load_logo_asset, default_logo_asset, invalidate_logo_assets
 
 from app.utils.security import authenticated_admin, authenticated_user
 from app.models.user import User
@@ -66,6 +67,7 @@ def upload_logo(
     }
     db.commit()
     db.refresh(s)
+    invalidate_logo_assets()
 
     if old_path and old_path != meta["path"]:
         delete_file_if_exists(old_path)
@@ -81,12 +83,12 @@ def delete_logo(
     old_path = (s.config or {}).get("path")
     s.config = {}
     db.commit()
+    invalidate_logo_assets()
     delete_file_if_exists(old_path)
     return
 
 
 from sqlalchemy.orm import Session
-from pathlib import Path
 from datetime import datetime, timezone
 import email.utils as eut
 import os
@@ -119,10 +121,9 @@ def get_public_logo(
 
   if not path or not os.path.isfile(path):
     # Default-Logo als Fallback
-    default_logo_path = os.path.join(os.path.dirname(__file__), "../core/default_logo.png")
-    if os.path.isfile(default_logo_path):
-      with open(default_logo_path, "rb") as f:
-        data = f.read()
+    default_logo = default_logo_asset()
+    if default_logo:
+      data = default_logo.data
       etag = 'W/"default-logo"'
       if request.headers.get("If-None-Match") == etag:
         return Response(status_code=304)
@@ -145,18 +146,17 @@ def get_public_logo(
     }
     return Response(content=SVG_PLACEHOLDER, headers=headers, media_type="image/svg+xml")
 
-  p = Path(path)
-  try:
-    data = p.read_bytes()
-  except Exception:
+  logo = load_logo_asset(path, mime, sha256)
+  if not logo:
     raise HTTPException(404, "Logo not accessible")
 
-  etag = f'W/"{sha256}"' if sha256 else f'W/"{p.stat().st_mtime_ns}"'
+  data = logo.data
+  mtime = logo.mtime
+  etag = f'W/"{sha256}"' if sha256 else f'W/"{logo.mtime_ns}"'
   if_none_match = request.headers.get("If-None-Match")
   if if_none_match and if_none_match == etag:
     return Response(status_code=304)
 
-  mtime = p.stat().st_mtime
   last_modified = _http_date(mtime)
   if_modified_since = request.headers.get("If-Modified-Since")
   if if_modified_since:
@@ -9,6 +9,7 @@ from app.core.render_template import render_template
 from app.core.generate_report_summary import resolve_logo_data_url
 from app.utils.response_clean import process_api_response
 from app.services.import_templates import import_templates_from_repo
+from app.core.template_registry import invalidate_templates
 from fastapi.responses import HTMLResponse
 from jinja2 import UndefinedError
 from pydantic import BaseModel
@@ -88,6 +89,7 @@ def update_template(
 
     db.commit()
     db.refresh(template)
+    invalidate_templates()
     return template
 
 @router.delete("/{id}")
@@ -106,6 +108,7 @@ def delete_template(
     template.content = None
 
     db.commit()
+    invalidate_templates()
     return {"success": True}
 
 
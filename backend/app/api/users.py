@@ -7,7 +7,7 @@ from app.utils.responses import send_status_response
 from app.utils.crypto import hash_password
 import re
 
-from app.utils.security import authenticated_admin, not_found_response
+from app.utils.security import authenticated_admin, not_found_response, invalidate_user_cache
 from app.models.user import User
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -66,6 +66,7 @@ def delete_user(
     
     db.delete(user)
     db.commit()
+    invalidate_user_cache(id)
     return {"success": True}
 
 @router.get("/{id}", response_model=UserOut)
@@ -101,5 +102,6 @@ def update_user(
         setattr(user, key, value)
 
     db.commit()
+    invalidate_user_cache(user.id)
     db.refresh(user)
     return user
@@ -1,12 +1,17 @@
-import time, uuid, re
+import asyncio, os, random, time, uuid, re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Iterable, Optional
 from app.models.audit import ActorKind, AuditStatus
-from app.audit.audit import write_audit
+from app.audit.audit_sink import audit_sink
+from app.audit.audit_policy import AuditPolicies, audit_aggregator, audit_policies
 from app.audit.change_tracker import audit_changes_buffer
-from app.utils.security import load_user_from_token
+from app.utils.security import cached_user_for_token, resolve_user_values
 
 from app.utils.feature_flags import env_bool
 AUDIT_API_ENABLED = env_bool("AUDIT_API_ENABLED", True)
+# Threads for the middleware's synchronous DB work (user lookup), kept apart from
+# the threadpool that runs the sync route handlers.
+AUDIT_DB_THREADS = int(os.getenv("AUDIT_DB_THREADS", "8"))
 
 def decode_access_token(token: str) -> Optional[dict]:
     try:
@@ -30,10 +35,13 @@ class AuditMiddleware:
         app,
         db_session_factory,
         exclude_prefixes: Iterable[str] = ("/docs", "/redoc", "/openapi.json", "/health", "/metrics", "/favicon.ico"),
+        policies: Optional[AuditPolicies] = None,
     ):
         self.app = app
+        self.policies = policies or audit_policies
         self.db_session_factory = db_session_factory
         self.exclude_prefixes = tuple(exclude_prefixes)
+        self._db_executor = ThreadPoolExecutor(max_workers=AUDIT_DB_THREADS, thread_name_prefix="audit-db")
 
     def _should_skip(self, root_path: str, path: str) -> bool:
         full = f"{root_path}{path}" if root_path else path
@@ -111,11 +119,19 @@ class AuditMiddleware:
         state["user_agent"] = user_agent
 
         if not state.get("user_id"):
-            uid, uname, role = self._load_user_for_mw(headers)
-            if uid:
-                state["user_id"] = uid
-                state["username"] = uname
-                state["role"] = role
+            token = self._bearer_token(headers)
+            values = cached_user_for_token(token) if token else None
+            if token and values is None:
+                # Cache-Miss: sync SQLAlchemy nicht auf dem Event-Loop ausführen
+                loop = asyncio.get_running_loop()
+                values = await loop.run_in_executor(self._db_executor, self._load_user_for_mw, token)
+            if values:
+                # authenticated_user übernimmt den User für denselben Token ohne zweiten Lookup
+                state["auth_user"] = values
+                state["auth_token"] = token
+                state["user_id"] = str(values["id"])
+                state["username"] = values.get("username") or "anonymous"
+                state["role"] = values.get("role")
 
         status_holder = {"code": None}
 
@@ -179,9 +195,29 @@ class AuditMiddleware:
             }
 
             try:
-                with self.db_session_factory() as db:
-                    write_audit(
-                        db,
+                changes_buffer = audit_changes_buffer.get() or []
+            finally:
+                audit_changes_buffer.reset(token_var)
+
+            # Fehler und Requests mit Änderungen immer einzeln, sonst gilt die Policy der Route
+            write_request = True
+            policy = self.policies.for_request(method, root_path, path)
+            if policy.mode != "full" and status == AuditStatus.success and not changes_buffer:
+                write_request = False
+                if policy.mode == "aggregate":
+                    try:
+                        audit_aggregator.record(self._route_action(scope, method, root_path, path),
+                                                target_type, duration_ms, status_code, user_id)
+                    except Exception:
+                        pass
+                elif policy.mode == "sample" and random.random() < policy.rate:
+                    write_request = True
+                    context_common["sample_rate"] = policy.rate
+
+            # Geschrieben wird im Hintergrund (audit_sink), nicht auf dem Antwortpfad
+            try:
+                if write_request:
+                    audit_sink.write(
                         actor_kind=actor_kind,
                         user_id=user_id,
                         actor_label=actor_label,
@@ -199,51 +235,49 @@ class AuditMiddleware:
             except Exception:
                 pass
 
-            try:
-                changes_buffer = audit_changes_buffer.get() or []
-            finally:
-                audit_changes_buffer.reset(token_var)
-
             if changes_buffer:
                 try:
-                    with self.db_session_factory() as db:
-                        for item in changes_buffer:
-                            op    = item["op"]
-                            ttype = item["type"]
-                            tid   = item["id"]
-                            chg   = item["changes"]
-
-                            write_audit(
-                                db,
-                                actor_kind=actor_kind,
-                                user_id=user_id,
-                                actor_label=actor_label,
-                                action=f"{op} {ttype}",
-                                status=AuditStatus.info,
-                                target_type=ttype,
-                                target_id=str(tid) if tid is not None else None,
-                                message=None,
-                                request_id=request_id,
-                                correlation_id=correlation_id,
-                                ip=ip,
-                                user_agent=user_agent,
-                                context={"via": action, **context_common},
-                                changes=chg,
-                            )
+                    for item in changes_buffer:
+                        op    = item["op"]
+                        ttype = item["type"]
+                        tid   = item["id"]
+                        chg   = item["changes"]
+
+                        audit_sink.write(
+                            actor_kind=actor_kind,
+                            user_id=user_id,
+                            actor_label=actor_label,
+                            action=f"{op} {ttype}",
+                            status=AuditStatus.info,
+                            target_type=ttype,
+                            target_id=str(tid) if tid is not None else None,
+                            message=None,
+                            request_id=request_id,
+                            correlation_id=correlation_id,
+                            ip=ip,
+                            user_agent=user_agent,
+                            context={"via": action, **context_common},
+                            changes=chg,
+                        )
                 except Exception:
                     pass
 
-    def _load_user_for_mw(self, headers: dict) -> tuple[str|None, str|None, str|None]:
+    @staticmethod
+    def _route_action(scope, method: str, root_path: str, path: str) -> str:
+        # Routen-Template statt konkretem Pfad, damit IDs keine eigenen Aggregate bilden
+        template = getattr(scope.get("route"), "path_format", None) or path
+        return f"{method.upper()} {root_path}{template}" if root_path else f"{method.upper()} {template}"
+
+    @staticmethod
+    def _bearer_token(headers: dict) -> Optional[str]:
         auth = headers.get("authorization")
         if not auth or not auth.lower().startswith("bearer "):
-            return None, None, None
-        token = auth.split(" ", 1)[1].strip()
+            return None
+        return auth.split(" ", 1)[1].strip() or None
+
+    def _load_user_for_mw(self, token: str) -> Optional[dict]:
         try:
             with self.db_session_factory() as db:
-                user = load_user_from_token(token, db)
-                uid = str(user.id)
-                uname = getattr(user, "username", None) or getattr(user, "name", None) or "anonymous"
-                role = getattr(user, "role", None)
-                return uid, uname, role
+                return resolve_user_values(token, db)
         except Exception:
-            return None, None, None
+            return None
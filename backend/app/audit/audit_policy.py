@@ -0,0 +1,154 @@
+import math
+import os
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.models.audit import ActorKind, AuditStatus
+from app.audit.audit_sink import audit_row, audit_sink
+
+# Policy for read requests without a matching rule: full | aggregate | sample:<rate> | off
+AUDIT_API_READ_POLICY = os.getenv("AUDIT_API_READ_POLICY", "aggregate")
+# Per-prefix read policies, e.g. "/api/dashboard=aggregate;/api/logs=sample:0.1;/api/stats=off"
+AUDIT_API_RULES = os.getenv("AUDIT_API_RULES", "")
+AUDIT_AGGREGATE_SECONDS = max(1, int(os.getenv("AUDIT_AGGREGATE_SECONDS", "60")))
+
+# Mutationen werden immer einzeln protokolliert, Regeln gelten nur für lesende Requests
+MUTATING_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+@dataclass(frozen=True)
+class AuditPolicy:
+    mode: str  # full | aggregate | sample | off
+    rate: float = 1.0
+
+
+FULL = AuditPolicy("full")
+
+
+def parse_policy(value: str) -> AuditPolicy:
+    """Parses "full", "aggregate", "off" or "sample:<rate>"; anything invalid falls back to full."""
+    value = (value or "").strip().lower()
+    if value in ("full", "aggregate", "off"):
+        return AuditPolicy(value)
+    if value.startswith("sample:"):
+        try:
+            rate = float(value.split(":", 1)[1])
+        except ValueError:
+            rate = -1
+        if 0 <= rate <= 1:
+            return AuditPolicy("sample", rate)
+    print(f"⚠️  Invalid audit policy '{value}', auditing every request")
+    return FULL
+
+
+def parse_rules(value: str) -> list[tuple[str, AuditPolicy]]:
+    rules = []
+    for item in (value or "").replace(",", ";").split(";"):
+        if not item.strip():
+            continue
+        prefix, sep, policy = item.partition("=")
+        if not sep or not prefix.strip():
+            print(f"⚠️  Invalid audit rule '{item.strip()}' (expected <prefix>=<policy>)")
+            continue
+        rules.append((prefix.strip(), parse_policy(policy)))
+    # Längster Präfix gewinnt
+    return sorted(rules, key=lambda rule: len(rule[0]), reverse=True)
+
+
+class AuditPolicies:
+    def __init__(self, rules: str = AUDIT_API_RULES, read_policy: str = AUDIT_API_READ_POLICY):
+        self.rules = parse_rules(rules)
+        self.read_policy = parse_policy(read_policy)
+
+    def for_request(self, method: str, root_path: str, path: str) -> AuditPolicy:
+        if method.upper() in MUTATING_METHODS:
+            return FULL
+        full = f"{root_path}{path}" if root_path else path
+        for prefix, policy in self.rules:
+            if full.startswith(prefix) or path.startswith(prefix):
+                return policy
+        return self.read_policy
+
+
+def _percentile(values: list[int], pct: float) -> int:
+    ordered = sorted(values)
+    # Nearest-rank
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+@dataclass
+class _Window:
+    durations: list = field(default_factory=list)
+    status_codes: Counter = field(default_factory=Counter)
+    users: set = field(default_factory=set)
+
+
+class RequestAggregator:
+    """
+    Counts aggregated requests per action and time window. Closed windows are
+    turned into one audit row each (count, status codes, p50/p95/max duration)
+    by the audit sink's background thread.
+    """
+
+    def __init__(self, window_seconds: int = AUDIT_AGGREGATE_SECONDS):
+        self.window_seconds = window_seconds
+        self._windows: dict[tuple[int, str, Optional[str]], _Window] = {}
+        self._lock = threading.Lock()
+
+    def record(self, action: str, target_type: Optional[str], duration_ms: int, status_code: int,
+               user_id: Optional[str] = None, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        start = int(now // self.window_seconds) * self.window_seconds
+        with self._lock:
+            window = self._windows.get((start, action, target_type))
+            if window is None:
+                window = self._windows[(start, action, target_type)] = _Window()
+            window.durations.append(duration_ms)
+            window.status_codes[str(status_code)] += 1
+            if user_id:
+                window.users.add(user_id)
+        audit_sink.start()
+
+    def collect(self, force: bool = False, now: Optional[float] = None) -> list[dict]:
+        """Audit rows for all closed windows (all windows with force=True)."""
+        now = time.time() if now is None else now
+        current = int(now // self.window_seconds) * self.window_seconds
+        with self._lock:
+            due = [key for key in self._windows if force or key[0] < current]
+            closed = [(key, self._windows.pop(key)) for key in due]
+
+        rows = []
+        for (start, action, target_type), window in closed:
+            rows.append(audit_row(
+                actor_kind=ActorKind.system,
+                user_id=None,
+                actor_label="api",
+                action=action,
+                status=AuditStatus.info,
+                target_type=target_type,
+                target_id=None,
+                message=None,
+                request_id=None,
+                context={
+                    "aggregated": True,
+                    "window_start": datetime.fromtimestamp(start, timezone.utc).isoformat(),
+                    "window_seconds": self.window_seconds,
+                    "count": len(window.durations),
+                    "status_codes": dict(window.status_codes),
+                    "users": len(window.users),
+                    "p50_ms": _percentile(window.durations, 50),
+                    "p95_ms": _percentile(window.durations, 95),
+                    "max_ms": max(window.durations),
+                },
+            ))
+        return rows
+
+
+audit_policies = AuditPolicies()
+audit_aggregator = RequestAggregator()
+audit_sink.add_periodic(audit_aggregator.collect)
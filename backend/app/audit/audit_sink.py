@@ -0,0 +1,179 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, Mapping, Any
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.database import SessionLocal
+from app.models.audit import AuditLog, ActorKind, AuditStatus
+from app.audit.audit import sanitize
+
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "200"))
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "1"))
+
+
+def audit_row(
+    *,
+    actor_kind: ActorKind,
+    user_id: Optional[str],
+    actor_label: Optional[str],
+    action: str,
+    status: AuditStatus,
+    target_type: Optional[str],
+    target_id: Optional[str],
+    message: Optional[str],
+    request_id: Optional[str],
+    correlation_id: Optional[str] = None,
+    ip: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    context: Optional[Mapping[str, Any]] = None,
+    changes: Optional[Mapping[str, Any]] = None,
+) -> dict:
+    """Same fields as write_audit, as a row for a bulk INSERT (created_at is taken now, not at flush time)."""
+    return {
+        "actor_kind": actor_kind,
+        "user_id": user_id,
+        "actor_label": actor_label,
+        "action": action,
+        "status": status,
+        "target_type": target_type,
+        "target_id": target_id,
+        "message": message,
+        "request_id": request_id,
+        "correlation_id": correlation_id,
+        "ip": ip,
+        "user_agent": user_agent,
+        "context": sanitize(context) if context else None,
+        "changes": changes if changes else None,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+class AuditSink:
+    """
+    Collects audit rows in a bounded in-memory queue and writes them from a
+    background thread in bulk INSERTs, so requests never wait for the audit
+    commit. When the queue is full, rows are dropped and counted.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=AUDIT_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._periodic = []
+        self.dropped = 0
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+                self._thread.start()
+
+    def start(self) -> None:
+        self._ensure_thread()
+
+    def add_periodic(self, collect) -> None:
+        """
+        Registers collect(force=False) -> list of rows; it is called from the
+        sink thread about every AUDIT_FLUSH_SECONDS and on flush (force=True).
+        """
+        self._periodic.append(collect)
+
+    def _collect_periodic(self, force: bool = False) -> list[dict]:
+        rows = []
+        for collect in self._periodic:
+            try:
+                rows.extend(collect(force=force))
+            except Exception as e:
+                print(f"⚠️  Collecting periodic audit records failed: {e}")
+        return rows
+
+    def enqueue(self, row: dict) -> None:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                print(f"⚠️  Audit queue full, dropped {self.dropped} record(s) so far")
+
+    def write(self, **fields) -> None:
+        self.enqueue(audit_row(**fields))
+
+    def _take_batch(self) -> list[dict]:
+        batch = []
+        deadline = time.monotonic() + AUDIT_FLUSH_SECONDS
+        while len(batch) < AUDIT_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _insert(self, rows: list[dict]) -> None:
+        with self.session_factory() as db:
+            try:
+                db.execute(insert(AuditLog), rows)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+    def _write(self, batch: list[dict]) -> None:
+        try:
+            self._insert(batch)
+            return
+        except (IntegrityError, DataError) as e:
+            if len(batch) == 1:
+                self.dropped += 1
+                print(f"⚠️  Audit record rejected by the database, dropped: {e}")
+                return
+        except Exception as e:
+            # DB nicht erreichbar o. ä.: Aufteilen bringt nichts
+            self.dropped += len(batch)
+            print(f"⚠️  Writing {len(batch)} audit record(s) failed, dropped: {e}")
+            return
+
+        # Ein fehlerhafter Datensatz soll nicht den ganzen Batch kosten: halbieren, bis er isoliert ist
+        middle = len(batch) // 2
+        self._write(batch[:middle])
+        self._write(batch[middle:])
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            batch.extend(self._collect_periodic())
+            if batch:
+                self._write(batch)
+
+    def flush(self) -> None:
+        """Writes everything that is queued right now, including open aggregates (used on shutdown)."""
+        batch = self._collect_periodic(force=True)
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= AUDIT_BATCH_SIZE:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+
+audit_sink = AuditSink()
+atexit.register(audit_sink.flush)
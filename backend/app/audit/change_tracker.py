@@ -21,34 +21,54 @@ def _serialize(v: Any) -> Any:
     except Exception:
         return None
 
-def _pk(obj) -> Optional[str]:
-    insp = sa_inspect(obj)
-    parts = []
-    for col in insp.mapper.primary_key:
-        v = getattr(obj, col.key, None)
-        if v is None:
-            return None 
-        parts.append(str(v)) 
-    return ":".join(parts)
-
-def snapshot(obj) -> Dict[str, Any]:
-    insp = sa_inspect(obj)
-    out: Dict[str, Any] = {}
-    for col in insp.mapper.column_attrs:
-        k = col.key
-        if k in IGNORE or k in SENSITIVE:
-            continue
-        out[k] = _serialize(getattr(obj, k))
-    return out
+class _MapperInfo:
+    """Per mapper, computed once: table name, primary-key and audited column attribute keys."""
+    __slots__ = ("table", "pk_keys", "keys", "skip")
+
+    def __init__(self, mapper):
+        self.table = getattr(mapper.class_, "__tablename__", None)
+        self.pk_keys = tuple(mapper.get_property_by_column(col).key for col in mapper.primary_key)
+        self.keys = tuple(
+            attr.key for attr in mapper.column_attrs
+            if attr.key not in IGNORE and attr.key not in SENSITIVE
+        )
+        self.skip = self.table in SKIP_TABLES
+
+
+_mapper_infos: Dict[Any, _MapperInfo] = {}
 
-def diff_obj(obj) -> Dict[str, Dict[str, Any]]:
+def _info(insp) -> _MapperInfo:
+    mapper = insp.mapper
+    info = _mapper_infos.get(mapper)
+    if info is None:
+        info = _mapper_infos[mapper] = _MapperInfo(mapper)
+    return info
+
+def _pk(obj, info: Optional[_MapperInfo] = None) -> Optional[str]:
     insp = sa_inspect(obj)
+    # Persistente Objekte: PK aus dem Identity-Key, ohne abgelaufene Attribute nachzuladen
+    values = insp.identity or tuple(getattr(obj, key, None) for key in (info or _info(insp)).pk_keys)
+    if any(v is None for v in values):
+        return None
+    return ":".join(str(v) for v in values)
+
+def snapshot(obj, info: Optional[_MapperInfo] = None) -> Dict[str, Any]:
+    info = info or _info(sa_inspect(obj))
+    return {k: _serialize(getattr(obj, k)) for k in info.keys}
+
+def diff_obj(obj, insp=None, info: Optional[_MapperInfo] = None) -> Dict[str, Dict[str, Any]]:
+    insp = insp or sa_inspect(obj)
+    info = info or _info(insp)
     changes: Dict[str, Dict[str, Any]] = {}
-    for col in insp.mapper.column_attrs:
-        k = col.key
-        if k in IGNORE or k in SENSITIVE:
+    # Nur Attribute mit gespeichertem Originalwert können geändert sein
+    modified = insp.committed_state
+    if not modified:
+        return changes
+    attrs = insp.attrs
+    for k in info.keys:
+        if k not in modified:
             continue
-        hist = getattr(insp.attrs, k).history
+        hist = attrs[k].history
         if not hist.has_changes():
             continue
         old = hist.deleted[0] if hist.deleted else None
@@ -57,39 +77,50 @@ def diff_obj(obj) -> Dict[str, Dict[str, Any]]:
             changes[k] = {"old": _serialize(old), "new": _serialize(new)}
     return changes
 
-def record_change(op: str, obj, changes: dict):
-    buf = audit_changes_buffer.get()
-    if buf is None:
-        return
+def _append(buf: list, op: str, obj, info: _MapperInfo, changes: dict):
     buf.append({
         "op": op,
-        "type": obj.__tablename__,
-        "id": _pk(obj),
+        "type": info.table,
+        "id": _pk(obj, info),
         # "__obj": obj,  # entfernt, um DetachedInstanceError zu vermeiden
         "changes": changes,
     })
 
+def record_change(op: str, obj, changes: dict):
+    buf = audit_changes_buffer.get()
+    if buf is None:
+        return
+    _append(buf, op, obj, _info(sa_inspect(obj)), changes)
+
 
 @event.listens_for(SASession, "before_flush")
 def collect_changes(session: SASession, flush_context, instances):
+    # Ohne aktiven Buffer (Worker ohne Audit, Skripte) wird nichts gesammelt
+    buf = audit_changes_buffer.get()
+    if buf is None:
+        return
+
     for obj in session.new:
-        if getattr(obj, "__tablename__", None) in SKIP_TABLES:
+        info = _info(sa_inspect(obj))
+        if info.skip:
             continue
-        snap = snapshot(obj)
+        snap = snapshot(obj, info)
         if snap:
-            record_change("create", obj, {k: {"old": None, "new": v} for k, v in snap.items()})
+            _append(buf, "create", obj, info, {k: {"old": None, "new": v} for k, v in snap.items()})
 
     for obj in session.dirty:
-        if getattr(obj, "__tablename__", None) in SKIP_TABLES:
+        insp = sa_inspect(obj)
+        info = _info(insp)
+        if info.skip:
             continue
-        if session.is_modified(obj, include_collections=True):
-            changes = diff_obj(obj)
-            if changes:
-                record_change("update", obj, changes)
+        changes = diff_obj(obj, insp, info)
+        if changes:
+            _append(buf, "update", obj, info, changes)
 
     for obj in session.deleted:
-        if getattr(obj, "__tablename__", None) in SKIP_TABLES:
+        info = _info(sa_inspect(obj))
+        if info.skip:
             continue
-        snap = snapshot(obj)
+        snap = snapshot(obj, info)
         if snap:
-            record_change("delete", obj, {k: {"old": v, "new": None} for k, v in snap.items()})
\ No newline at end of file
+            _append(buf, "delete", obj, info, {k: {"old": v, "new": None} for k, v in snap.items()})
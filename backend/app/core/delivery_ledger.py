@@ -0,0 +1,59 @@
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.delivery_ledger import DeliveryLedger
+
+LEDGER_KEY = ["job_id", "run_date", "channel", "target_id", "status", "triggered_by"]
+
+
+def record_delivery(db: Session, *, job_id, run_date: date, channel: str, target_id, status: str, triggered_by: Optional[str]) -> None:
+    """Adds one entry to the per-day ledger; repeated entries are ignored by the unique index."""
+    stmt = insert(DeliveryLedger).values(
+        job_id=job_id,
+        run_date=run_date,
+        channel=channel,
+        target_id=str(target_id),
+        status=status,
+        triggered_by=triggered_by or "",
+    ).on_conflict_do_nothing(index_elements=LEDGER_KEY)
+    db.execute(stmt)
+
+
+def record_deliveries(db: Session, entries: list[dict]) -> None:
+    """Bulk variant of record_delivery for the buffered job log writer."""
+    if not entries:
+        return
+    unique = {tuple(str(entry[k]) for k in LEDGER_KEY): entry for entry in entries}
+    db.execute(
+        insert(DeliveryLedger).on_conflict_do_nothing(index_elements=LEDGER_KEY),
+        [{**entry, "target_id": str(entry["target_id"])} for entry in unique.values()],
+    )
+
+
+def load_successes(db: Session, job_ids: Iterable, run_date: date) -> dict[str, set[tuple[str, str, str]]]:
+    """
+    Successful deliveries of the given jobs on run_date, in one indexed query:
+    {job_id: {(channel, target_id, triggered_by), ...}}
+    """
+    job_ids = list(job_ids)
+    result: dict[str, set[tuple[str, str, str]]] = {str(job_id): set() for job_id in job_ids}
+    if not job_ids:
+        return result
+
+    rows = db.query(
+        DeliveryLedger.job_id,
+        DeliveryLedger.channel,
+        DeliveryLedger.target_id,
+        DeliveryLedger.triggered_by,
+    ).filter(
+        DeliveryLedger.job_id.in_(job_ids),
+        DeliveryLedger.run_date == run_date,
+        DeliveryLedger.status == "success",
+    ).all()
+
+    for job_id, channel, target_id, triggered_by in rows:
+        result.setdefault(str(job_id), set()).add((channel, target_id, triggered_by))
+    return result
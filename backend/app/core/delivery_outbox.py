@@ -0,0 +1,188 @@
+import os
+from datetime import datetime, timedelta, date
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.delivery_outbox import DeliveryOutbox
+from app.models.jobs_log import JobLog
+from app.models.sender import Sender
+from app.models.webhooks import WebhookRecipient
+from app.core.email.send_email import submit_message_groups
+from app.core.email.delivery import RecipientsRefused
+from app.core.webhook.send_webhook import post_webhook
+from app.utils.feature_flags import env_bool
+from app.utils.logging import finish_pending_detail
+
+# Scheduled runs store rendered deliveries in delivery_outbox and a delivery worker sends them.
+OUTBOX_ENABLED = env_bool("DELIVERY_OUTBOX_ENABLED", False)
+OUTBOX_BATCH_SIZE = int(os.getenv("DELIVERY_OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("DELIVERY_OUTBOX_MAX_ATTEMPTS", "5"))
+# First retry delay; doubles with every failed attempt.
+OUTBOX_RETRY_SECONDS = int(os.getenv("DELIVERY_OUTBOX_RETRY_SECONDS", "60"))
+# A claimed row becomes visible again after this long, in case its worker died.
+OUTBOX_LOCK_SECONDS = int(os.getenv("DELIVERY_OUTBOX_LOCK_SECONDS", "600"))
+
+
+def enqueue_delivery(
+    db: Session,
+    log: JobLog,
+    *,
+    job_id,
+    run_date: date,
+    channel: str,
+    target_id,
+    payload: bytes,
+    meta: Optional[dict] = None,
+) -> DeliveryOutbox:
+    """Stores a rendered delivery; the job log stays "queued" until the delivery worker has sent it."""
+    row = DeliveryOutbox(
+        job_id=job_id,
+        job_log_id=log.id,
+        run_date=run_date,
+        channel=channel,
+        target_id=str(target_id),
+        payload=payload,
+        meta=meta or {},
+    )
+    db.add(row)
+    log.count_pending = (log.count_pending or 0) + 1
+    return row
+
+
+def _claim_batch(db: Session, now: datetime, limit: int) -> list[DeliveryOutbox]:
+    rows = db.query(DeliveryOutbox).filter(
+        DeliveryOutbox.status == "pending",
+        DeliveryOutbox.next_attempt_at <= now,
+    ).order_by(DeliveryOutbox.next_attempt_at).limit(limit).with_for_update(skip_locked=True).all()
+
+    for row in rows:
+        row.attempts += 1
+        row.next_attempt_at = now + timedelta(seconds=OUTBOX_LOCK_SECONDS)
+    db.commit()
+    return rows
+
+
+def _load_targets(db: Session, rows: list[DeliveryOutbox]) -> tuple[dict, dict]:
+    """Senders and webhooks of a batch, one query each."""
+    sender_ids = {row.target_id for row in rows if row.channel == "EMAIL"}
+    webhook_ids = {row.target_id for row in rows if row.channel != "EMAIL"}
+    senders = db.query(Sender).filter(Sender.id.in_(sender_ids)).all() if sender_ids else []
+    webhooks = db.query(WebhookRecipient).filter(WebhookRecipient.id.in_(webhook_ids)).all() if webhook_ids else []
+    return {str(s.id): s for s in senders}, {str(w.id): w for w in webhooks}
+
+
+def _submit(row: DeliveryOutbox, senders: dict, webhooks: dict) -> list:
+    """Starts the delivery of a row; returns (recipients, future) per transaction (recipients is None for webhooks)."""
+    if row.channel == "EMAIL":
+        sender = senders.get(row.target_id)
+        if not sender:
+            raise Exception(f"No sender found for ID {row.target_id}")
+        return submit_message_groups(sender, row.meta.get("recipients") or [], row.payload)
+
+    webhook = webhooks.get(row.target_id)
+    if not webhook:
+        raise Exception(f"skipped|Webhook {row.target_id} no longer exists")
+    return [(None, post_webhook(webhook, row.payload, wait=False))]
+
+
+def _wait(deliveries: list) -> tuple[Optional[Exception], list[str]]:
+    """Waits for all transactions of a row; returns the first error and the recipients that were not accepted."""
+    error = None
+    failed: list[str] = []
+    for recipients, future in deliveries:
+        try:
+            future.result()
+        except RecipientsRefused as e:
+            # Nur die abgelehnten Adressen, der Rest der Transaktion ist zugestellt
+            error = error or e
+            failed.extend(r for r in recipients if r in e.recipients)
+        except Exception as e:
+            error = error or e
+            failed.extend(recipients or [])
+    return error, failed
+
+
+def _record(db: Session, row: DeliveryOutbox, error: Optional[Exception], now: datetime,
+            failed_recipients: Optional[list[str]] = None) -> None:
+    msg = str(error) if error else None
+    skipped = bool(msg and "skipped|" in msg)
+
+    if error and not skipped and row.attempts < OUTBOX_MAX_ATTEMPTS:
+        row.status = "pending"
+        row.last_error = msg
+        row.next_attempt_at = now + timedelta(seconds=OUTBOX_RETRY_SECONDS * 2 ** (row.attempts - 1))
+        if row.channel == "EMAIL" and failed_recipients:
+            # Bereits angenommene Empfänger bekommen die Mail beim nächsten Versuch nicht noch einmal
+            meta = dict(row.meta or {})
+            recipients = meta.get("recipients") or []
+            meta["delivered"] = (meta.get("delivered") or []) + [r for r in recipients if r not in failed_recipients]
+            meta["recipients"] = [r for r in recipients if r in failed_recipients]
+            row.meta = meta
+        return
+
+    row.status = "failed" if error else "sent"
+    row.last_error = msg
+    row.sent_at = now if not error else None
+
+    if row.job_log_id:
+        log = db.query(JobLog).filter_by(id=row.job_log_id).with_for_update().first()
+        if log:
+            if skipped:
+                finish_pending_detail(log, channel=row.channel, target_id=row.target_id, status="skipped",
+                                      error=msg.replace("skipped|", ""))
+            else:
+                finish_pending_detail(log, channel=row.channel, target_id=row.target_id,
+                                      status="success" if row.status == "sent" else "failed", error=msg)
+
+
+def drain_outbox(batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """
+    Sends pending deliveries batch by batch until nothing is due. Rows are
+    claimed with SKIP LOCKED, so several delivery workers can drain in
+    parallel. Returns the number of processed rows.
+    """
+    db: Session = SessionLocal()
+    processed = 0
+    try:
+        while True:
+            now = datetime.utcnow()
+            rows = _claim_batch(db, now, batch_size)
+            if not rows:
+                return processed
+
+            # Erst alles abschicken, dann auf die Ergebnisse warten
+            senders, webhooks = _load_targets(db, rows)
+            submitted = []
+            for row in rows:
+                try:
+                    submitted.append((row, _submit(row, senders, webhooks)))
+                except Exception as e:
+                    submitted.append((row, e))
+
+            now = datetime.utcnow()
+            for row, deliveries in submitted:
+                if isinstance(deliveries, Exception):
+                    _record(db, row, deliveries, now)
+                else:
+                    error, failed = _wait(deliveries)
+                    _record(db, row, error, now, failed)
+            db.commit()
+            processed += len(rows)
+    finally:
+        db.close()
+
+
+def purge_delivery_outbox(retention_days: int = 7) -> int:
+    """Deletes sent and failed rows older than retention_days."""
+    db: Session = SessionLocal()
+    try:
+        deleted = db.query(DeliveryOutbox).filter(
+            DeliveryOutbox.status.in_(["sent", "failed"]),
+            DeliveryOutbox.created_at < datetime.utcnow() - timedelta(days=retention_days),
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    finally:
+        db.close()
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from app.models.sender import Sender
+from app.core.email.smtp_pool import SMTPConnectionPool, smtp_pool
+
+# Messages that may be queued or in flight per process; submit() blocks beyond this (backpressure).
+SMTP_MAX_PENDING_MESSAGES = int(os.getenv("SMTP_MAX_PENDING_MESSAGES", "200"))
+# Parallel SMTP sessions per sender (same host, port and account).
+SMTP_MAX_CONNECTIONS_PER_SENDER = int(os.getenv("SMTP_MAX_CONNECTIONS_PER_SENDER", "4"))
+# Messages per second and SMTP host, 0 = unlimited.
+SMTP_HOST_RATE_LIMIT = float(os.getenv("SMTP_HOST_RATE_LIMIT", "0"))
+# Threads that run the blocking SMTP dialogue for the event loop.
+SMTP_DELIVERY_THREADS = int(os.getenv("SMTP_DELIVERY_THREADS", "16"))
+
+
+class RecipientsRefused(Exception):
+    """Some recipients of a transaction were refused; the others were accepted."""
+
+    def __init__(self, recipients: Iterable[str]):
+        self.recipients = set(recipients)
+        super().__init__(f"SMTP recipients refused: {', '.join(sorted(self.recipients))}")
+
+
+@dataclass(frozen=True)
+class SenderSnapshot:
+    """SMTP settings of a sender, detached from the SQLAlchemy session so other threads can use them."""
+    email: str
+    smtp_host: str
+    smtp_port: int
+    smtp_username: Optional[str]
+    smtp_password: Optional[str]
+    use_tls: bool
+    use_ssl: bool
+    use_auth: bool
+
+    @classmethod
+    def from_sender(cls, sender: Sender) -> "SenderSnapshot":
+        return cls(
+            email=sender.email,
+            smtp_host=sender.smtp_host,
+            smtp_port=sender.smtp_port,
+            smtp_username=sender.smtp_username,
+            smtp_password=sender.smtp_password,
+            use_tls=bool(sender.use_tls),
+            use_ssl=bool(sender.use_ssl),
+            use_auth=bool(getattr(sender, "use_auth", False)),
+        )
+
+
+class _RateLimiter:
+    """Spaces messages to one host evenly at the configured rate."""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            delay = self._next - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = max(loop.time(), self._next) + self._interval
+
+
+class DeliveryEngine:
+    """
+    Delivers mails from an asyncio loop running in a background thread.
+    Each sender gets its own concurrency limit and each host its own rate
+    limit, so jobs on different mail servers no longer wait for each other.
+    """
+
+    def __init__(self, pool: SMTPConnectionPool = smtp_pool):
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(SMTP_MAX_PENDING_MESSAGES)
+        # Only touched from the loop thread
+        self._sender_limits: dict[tuple, asyncio.Semaphore] = {}
+        self._host_limits: dict[str, _RateLimiter] = {}
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # Celery forks its workers; a loop thread inherited from the parent does not run in the child.
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="smtp-delivery", daemon=True).start()
+                self._loop = loop
+                self._executor = ThreadPoolExecutor(max_workers=SMTP_DELIVERY_THREADS, thread_name_prefix="smtp-delivery")
+                self._sender_limits = {}
+                self._host_limits = {}
+                self._slots = threading.BoundedSemaphore(SMTP_MAX_PENDING_MESSAGES)
+                self._pid = os.getpid()
+            return self._loop
+
+    def submit(self, sender: SenderSnapshot, to_addrs, msg: bytes) -> Future:
+        """Queues one message and returns a Future; blocks while SMTP_MAX_PENDING_MESSAGES are in flight."""
+        loop = self._ensure_loop()
+        slots = self._slots
+        slots.acquire()
+        try:
+            future = asyncio.run_coroutine_threadsafe(self._deliver(sender, to_addrs, msg), loop)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    async def _deliver(self, sender: SenderSnapshot, to_addrs, msg: bytes) -> None:
+        key = self._pool._key(sender)
+        limit = self._sender_limits.get(key)
+        if limit is None:
+            limit = self._sender_limits[key] = asyncio.Semaphore(max(1, SMTP_MAX_CONNECTIONS_PER_SENDER))
+
+        async with limit:
+            if SMTP_HOST_RATE_LIMIT > 0:
+                host = self._host_limits.get(sender.smtp_host)
+                if host is None:
+                    host = self._host_limits[sender.smtp_host] = _RateLimiter(SMTP_HOST_RATE_LIMIT)
+                await host.wait()
+
+            loop = asyncio.get_running_loop()
+            refused = await loop.run_in_executor(
+                self._executor, self._pool.sendmail, sender, sender.email, to_addrs, msg
+            )
+
+        if refused:
+            raise RecipientsRefused(refused)
+
+
+def wait_all(futures: Iterable[Future]) -> None:
+    """Wartet auf alle Zustellungen und wirft den ersten Fehler."""
+    error = None
+    for future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            if error is None:
+                error = e
+    if error is not None:
+        raise error
+
+
+delivery_engine = DeliveryEngine()
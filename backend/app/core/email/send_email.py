@@ -1,58 +1,85 @@
-import smtplib
 import os
+from concurrent.futures import Future
+from email.header import Header
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.models.sender import Sender
+from app.core.email.delivery import SenderSnapshot, delivery_engine, wait_all
 
-from email.mime.image import MIMEImage
-
-def send_email(sender: Sender, to: list[str], subject: str, body: str, html: str = None, logo_path: str = None, logo_mime: str = None):
-    """Versendet separate E-Mails an jeden Empfänger, Logo als Anhang mit CID."""
-
-    smtp_args = {
-        "host": sender.smtp_host,
-        "port": sender.smtp_port,
-    }
-
-    if sender.use_ssl:
-        server = smtplib.SMTP_SSL(**smtp_args)
-    else:
-        server = smtplib.SMTP(**smtp_args)
-        if sender.use_tls:
-            server.starttls()
-
-    if getattr(sender, "use_auth", False) and sender.smtp_username and sender.smtp_password:
-        try:
-            server.login(sender.smtp_username, sender.smtp_password)
-        except smtplib.SMTPAuthenticationError as e:
-            raise Exception(f"SMTP Authentication Error: {e}")
-        except smtplib.SMTPConnectError as e:
-            raise Exception(f"SMTP Connection Error: {e}")
-        except smtplib.SMTPException as e:
-            raise Exception(f"SMTP Error: {e}")
-        except Exception as e:
-            raise Exception(f"An unexpected error occurred: {e}")
-
-    for recipient in to:
-        msg = MIMEMultipart("related")
-        alt = MIMEMultipart("alternative")
-        alt.attach(MIMEText(body, "plain", "utf-8"))
-        if html:
-            alt.attach(MIMEText(html, "html", "utf-8"))
-        msg.attach(alt)
-
-        msg["Subject"] = subject
-        msg["From"] = sender.email
-        msg["To"] = recipient
-
-        # Logo als Anhang mit CID
-        if logo_path and os.path.isfile(logo_path):
-            with open(logo_path, "rb") as f:
-                img = MIMEImage(f.read(), _subtype=(logo_mime.split("/")[-1] if logo_mime else None))
-                img.add_header('Content-ID', '<logo_cid>')
-                img.add_header('Content-Disposition', 'inline', filename=os.path.basename(logo_path))
-                msg.attach(img)
-
-        server.sendmail(sender.email, recipient, msg.as_string())
-
-    server.quit()
\ No newline at end of file
+from app.core.logo_assets import load_logo_asset
+
+# Upper bound of RCPT TO commands per transaction for the batched recipient modes
+SMTP_MAX_RECIPIENTS_PER_MESSAGE = int(os.getenv("SMTP_MAX_RECIPIENTS_PER_MESSAGE", "50"))
+
+def build_message(sender: Sender, subject: str, body: str, html: str = None, logo_path: str = None, logo_mime: str = None, logo_sha256: str = None) -> bytes:
+    """Baut die Mail einmal ohne To-Header und serialisiert sie (CRLF, bereit für SMTP DATA)."""
+    msg = MIMEMultipart("related")
+    alt = MIMEMultipart("alternative")
+    alt.attach(MIMEText(body, "plain", "utf-8"))
+    if html:
+        alt.attach(MIMEText(html, "html", "utf-8"))
+    msg.attach(alt)
+
+    msg["Subject"] = subject
+    msg["From"] = sender.email
+
+    # Logo als Anhang mit CID (eigener Part pro Nachricht, Base64 aus dem Asset-Cache)
+    logo = load_logo_asset(logo_path, logo_mime, logo_sha256)
+    if logo:
+        msg.attach(logo.mime_part())
+
+    return msg.as_bytes(policy=msg.policy.clone(linesep="\r\n"))
+
+def _to_header(recipient: str) -> bytes:
+    value = recipient if recipient.isascii() else Header(recipient, "utf-8").encode()
+    return f"To: {value}\r\n".encode("ascii")
+
+def _visible_to_header(recipients: list[str]) -> bytes:
+    values = [r if r.isascii() else Header(r, "utf-8").encode() for r in recipients]
+    return ("To: " + ",\r\n ".join(values) + "\r\n").encode("ascii")
+
+def _chunks(items: list[str], size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _submit_batched(account: SenderSnapshot, to: list[str], message: bytes, mode: str, limit: int) -> list:
+    """Eine DATA-Transaktion pro Chunk mit mehreren RCPT TO."""
+    groups = []
+    for chunk in _chunks(to, max(1, limit)):
+        if mode == "visible":
+            header = _visible_to_header(chunk)
+        else:
+            header = b"To: undisclosed-recipients:;\r\n"
+        groups.append((chunk, delivery_engine.submit(account, chunk, header + message)))
+    return groups
+
+def submit_message_groups(sender: Sender, to: list[str], message: bytes) -> list[tuple[list[str], Future]]:
+    """
+    Übergibt eine fertig gebaute Mail (ohne To-Header) an die Delivery-Engine, je nach sender.recipient_mode.
+    Gibt pro SMTP-Transaktion die Empfänger und das Future zurück.
+    """
+    account = SenderSnapshot.from_sender(sender)
+
+    mode = getattr(sender, "recipient_mode", None) or "individual"
+    if mode != "individual":
+        limit = sender.max_recipients_per_message or SMTP_MAX_RECIPIENTS_PER_MESSAGE
+        return _submit_batched(account, to, message, mode, limit)
+
+    return [
+        ([recipient], delivery_engine.submit(account, recipient, _to_header(recipient) + message))
+        for recipient in to
+    ]
+
+def submit_message(sender: Sender, to: list[str], message: bytes) -> list:
+    """Wie submit_message_groups, nur die Futures."""
+    return [future for _, future in submit_message_groups(sender, to, message)]
+
+def submit_email(sender: Sender, to: list[str], subject: str, body: str, html: str = None, logo_path: str = None, logo_mime: str = None, logo_sha256: str = None) -> list:
+    """Übergibt die Mail an die Delivery-Engine und gibt die Futures der einzelnen Transaktionen zurück."""
+
+    message = build_message(sender, subject, body, html=html, logo_path=logo_path, logo_mime=logo_mime, logo_sha256=logo_sha256)
+    return submit_message(sender, to, message)
+
+def send_email(sender: Sender, to: list[str], subject: str, body: str, html: str = None, logo_path: str = None, logo_mime: str = None, logo_sha256: str = None):
+    """Versendet separate E-Mails an jeden Empfänger (oder gebündelt, je nach sender.recipient_mode), Logo als Anhang mit CID."""
+    wait_all(submit_email(sender, to, subject, body, html=html, logo_path=logo_path, logo_mime=logo_mime, logo_sha256=logo_sha256))
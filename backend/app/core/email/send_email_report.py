@@ -1,13 +1,16 @@
 from sqlalchemy.orm import Session
 from app.models.jobs import Job
 from app.models.sender import Sender
-from app.models.template import MailTemplate
-from app.core.email.send_email import send_email
+from app.core.template_registry import get_template
+from app.core.email.send_email import build_message, submit_message
+from app.core.email.delivery import wait_all
 from app.core.render_template import render_template
 from app.utils.response_clean import process_api_response
 
-def send_email_report(db: Session, job: Job, summary: dict):
-    sender = db.query(Sender).filter_by(id=job.mailer_id).first()
+def render_email_report(db: Session, job: Job, summary: dict, sender: Sender = None) -> tuple[Sender, bytes]:
+    """Rendert die Report-Mail und gibt Sender und fertige Nachricht (ohne To-Header) zurück."""
+    if sender is None:
+        sender = db.query(Sender).filter_by(id=job.mailer_id).first()
     if not sender:
         raise Exception(f"No sender found for ID {job.mailer_id}")
 
@@ -15,10 +18,7 @@ def send_email_report(db: Session, job: Job, summary: dict):
     job_report_type = job.report_type.upper()
     sender_type = 'EMAIL_' + job_report_type + (f'_{report_type}' if report_type else '')
 
-    template = db.query(MailTemplate).filter_by(
-        type=job.template_type, 
-        sender_type=sender_type
-    ).first()
+    template = get_template(db, job.template_type, sender_type)
 
     if not template:
         raise Exception(f"Mail template not found. {sender_type}")
@@ -35,12 +35,22 @@ def send_email_report(db: Session, job: Job, summary: dict):
     html_body = process_api_response(response=html_body, db=db)
     text_body = "This email contains an HTML layout. Please enable HTML view in your email client."
 
-    send_email(
-        sender=sender,
-        to=job.email_recipients,
+    message = build_message(
+        sender,
         subject=f"{job.name}",
         body=text_body,
         html=html_body,
         logo_path=summary.get("logo_path"),
         logo_mime=summary.get("logo_mime"),
-    )
\ No newline at end of file
+        logo_sha256=summary.get("logo_sha256"),
+    )
+    return sender, message
+
+def send_email_report(db: Session, job: Job, summary: dict, wait: bool = True, sender: Sender = None):
+    sender, message = render_email_report(db, job, summary, sender=sender)
+    deliveries = submit_message(sender, job.email_recipients, message)
+
+    # wait=False: Versand läuft im Hintergrund weiter, der Aufrufer wartet später auf die Futures
+    if wait:
+        wait_all(deliveries)
+    return deliveries
@@ -0,0 +1,164 @@
+import hashlib
+import os
+import smtplib
+import threading
+import time
+from typing import Optional
+
+from app.models.sender import Sender
+
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+# Connections are reconnected after this many messages.
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+# Idle connections older than this are closed instead of reused.
+SMTP_POOL_IDLE_SECONDS = float(os.getenv("SMTP_POOL_IDLE_SECONDS", "60"))
+# Idle connections older than this are checked with NOOP before reuse.
+SMTP_NOOP_AFTER_SECONDS = float(os.getenv("SMTP_NOOP_AFTER_SECONDS", "5"))
+
+
+class _PooledConnection:
+    def __init__(self, key: tuple, server: smtplib.SMTP):
+        self.key = key
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+def _close(conn: _PooledConnection) -> None:
+    try:
+        conn.server.quit()
+    except Exception:
+        try:
+            conn.server.close()
+        except Exception:
+            pass
+
+
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP connections per sender so consecutive jobs skip connect, STARTTLS and AUTH."""
+
+    def __init__(self):
+        self._idle: dict[tuple, list[_PooledConnection]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(sender: Sender) -> tuple:
+        password = hashlib.sha256((sender.smtp_password or "").encode("utf-8")).hexdigest()
+        return (sender.smtp_host, sender.smtp_port, sender.smtp_username, password, bool(sender.use_ssl), bool(sender.use_tls))
+
+    @staticmethod
+    def _connect(sender: Sender) -> smtplib.SMTP:
+        smtp_args = {
+            "host": sender.smtp_host,
+            "port": sender.smtp_port,
+            "timeout": SMTP_TIMEOUT,
+        }
+
+        if sender.use_ssl:
+            server = smtplib.SMTP_SSL(**smtp_args)
+        else:
+            server = smtplib.SMTP(**smtp_args)
+            if sender.use_tls:
+                server.starttls()
+
+        if getattr(sender, "use_auth", False) and sender.smtp_username and sender.smtp_password:
+            try:
+                server.login(sender.smtp_username, sender.smtp_password)
+            except smtplib.SMTPAuthenticationError as e:
+                raise Exception(f"SMTP Authentication Error: {e}")
+            except smtplib.SMTPConnectError as e:
+                raise Exception(f"SMTP Connection Error: {e}")
+            except smtplib.SMTPException as e:
+                raise Exception(f"SMTP Error: {e}")
+            except Exception as e:
+                raise Exception(f"An unexpected error occurred: {e}")
+
+        return server
+
+    @staticmethod
+    def _is_alive(conn: _PooledConnection) -> bool:
+        if time.monotonic() - conn.last_used < SMTP_NOOP_AFTER_SECONDS:
+            return True
+        try:
+            return conn.server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _acquire(self, sender: Sender) -> _PooledConnection:
+        key = self._key(sender)
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                idle = self._idle.get(key) or []
+                conn = idle.pop() if idle else None
+            if conn is None:
+                break
+            if now - conn.last_used <= SMTP_POOL_IDLE_SECONDS and self._is_alive(conn):
+                return conn
+            _close(conn)
+        return _PooledConnection(key, self._connect(sender))
+
+    def _release(self, conn: _PooledConnection) -> None:
+        if conn.sent >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+            _close(conn)
+            return
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._idle.setdefault(conn.key, []).append(conn)
+
+    def _send_on(self, conn: _PooledConnection, from_addr: str, to_addrs, msg) -> dict:
+        try:
+            refused = conn.server.sendmail(from_addr, to_addrs, msg)
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError):
+            _close(conn)
+            raise
+        except smtplib.SMTPException:
+            # SMTPException ist eine OSError-Unterklasse, muss also vor OSError stehen.
+            # Abgelehnte Empfänger/Absender/Daten: smtplib hat mit RSET zurückgesetzt, die Session
+            # ist weiter nutzbar – außer der Server hat sie selbst beendet (421, sock ist dann None)
+            if conn.server.sock is None:
+                _close(conn)
+            else:
+                self._release(conn)
+            raise
+        except OSError:
+            _close(conn)
+            raise
+        except Exception:
+            self._release(conn)
+            raise
+
+        conn.sent += 1
+        self._release(conn)
+        return refused
+
+    def sendmail(self, sender: Sender, from_addr: str, to_addrs, msg) -> dict:
+        """Sends one message over a pooled connection; reconnects once if the server dropped it."""
+        conn = self._acquire(sender)
+        try:
+            return self._send_on(conn, from_addr, to_addrs, msg)
+        except smtplib.SMTPServerDisconnected:
+            conn = _PooledConnection(conn.key, self._connect(sender))
+            return self._send_on(conn, from_addr, to_addrs, msg)
+
+    def close_idle(self, max_idle_seconds: Optional[float] = None) -> None:
+        """Closes connections that have been idle for longer than max_idle_seconds (default: SMTP_POOL_IDLE_SECONDS)."""
+        limit = SMTP_POOL_IDLE_SECONDS if max_idle_seconds is None else max_idle_seconds
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for key, conns in list(self._idle.items()):
+                keep = [c for c in conns if now - c.last_used <= limit]
+                expired.extend(c for c in conns if now - c.last_used > limit)
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    del self._idle[key]
+        for conn in expired:
+            _close(conn)
+
+    def close_all(self) -> None:
+        self.close_idle(max_idle_seconds=-1)
+
+
+smtp_pool = SMTPConnectionPool()
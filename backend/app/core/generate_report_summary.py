@@ -1,18 +1,17 @@
-import base64
-import os
 from typing import Optional, Dict
 from sqlalchemy.orm import Session
 
 from app.models.jobs import Job
 from app.models.umami import Umami
-from app.models.system_settings import SystemSettings
 from app.core.umami import fetch_website_summary, fetch_report_summary
+from app.core.logo_assets import get_logo_asset, get_logo_config, default_logo_asset, DEFAULT_LOGO_PATH, DEFAULT_LOGO_MIME
 
 
 # ----------------------------- Public API -----------------------------
 
-def generate_report_summary(db: Session, job: Job) -> dict:
-    instance = db.query(Umami).filter_by(id=job.umami_id).first()
+def generate_report_summary(db: Session, job: Job, instance: Optional[Umami] = None) -> dict:
+    if instance is None:
+        instance = db.query(Umami).filter_by(id=job.umami_id).first()
     if not instance:
         raise Exception(f"No Umami instance found for ID {job.umami_id}")
 
@@ -27,22 +26,24 @@ def generate_report_summary(db: Session, job: Job) -> dict:
         raise Exception("No summary data returned.")
 
     summary["name"] = job.name
-    # Logo-Konfiguration holen
-    logo_cfg = _get_logo_config(db)
-    if logo_cfg and logo_cfg.get("path") and os.path.isfile(logo_cfg["path"]):
-        summary["logo_path"] = logo_cfg["path"]
-        summary["logo_mime"] = logo_cfg.get("mime", "image/png")
-    else:
-        # Fallback: Default-Logo als Datei
-        default_logo_path = os.path.join(os.path.dirname(__file__), "default_logo.png")
-        summary["logo_path"] = default_logo_path
-        summary["logo_mime"] = "image/png"
+    # Logo aus dem Asset-Cache, Fallback: Default-Logo als Datei
+    logo = get_logo_asset(db) or default_logo_asset()
+    summary["logo_path"] = logo.path if logo else DEFAULT_LOGO_PATH
+    summary["logo_mime"] = logo.mime if logo else DEFAULT_LOGO_MIME
+    summary["logo_sha256"] = logo.sha256 if logo else None
     # Für das HTML-Template: Platzhalter für die CID
     summary["embed_logo_cid"] = "cid:logo_cid"
 
     return summary
 
 
+def report_signature(job: Job) -> tuple:
+    """Identifies the data a job's summary is built from; jobs with equal signatures get identical summaries."""
+    if job.report_type == "report":
+        return (str(job.umami_id), job.website_id, job.report_type, job.report_id, job.timezone)
+    return (str(job.umami_id), job.website_id, job.report_type, tuple(job.summary_items or []), str(job.frequency))
+
+
 # ----------------------------- Logo logic -----------------------------
 
 def resolve_logo_data_url(db: Session) -> str:
@@ -50,11 +51,9 @@ def resolve_logo_data_url(db: Session) -> str:
     Nimmt (falls vorhanden) das LOGO aus SystemSettings (JSONB) und gibt eine data:-URL zurück.
     Fällt andernfalls auf embedded_logo() zurück.
     """
-    cfg = _get_logo_config(db)
-    if cfg:
-        data_url = _logo_config_to_data_url(cfg)
-        if data_url:
-            return data_url
+    logo = get_logo_asset(db)
+    if logo:
+        return logo.data_url
     return embedded_logo()
 
 
@@ -72,40 +71,7 @@ def _get_logo_config(db: Session) -> Optional[Dict]:
         "storage": "file"
       }
     """
-    row = db.query(SystemSettings).filter(SystemSettings.type == "LOGO").one_or_none()
-    if not row:
-        return None
-
-    # Falls deine Spalte anders heißt, hier anpassen (z. B. row.config / row.value ...)
-    value = getattr(row, "config", None) or getattr(row, "value", None)
-    if not isinstance(value, dict):
-        return None
-    return value
-
-
-def _logo_config_to_data_url(cfg: Dict) -> Optional[str]:
-    """
-    Baut aus der Logo-Config eine data:-URL.
-    Bevorzugt das lokale 'path'-Feld (embedded Base64 ist in E-Mails zuverlässiger als externe URLs).
-    """
-    path = (cfg.get("path") or "").strip()
-    mime = (cfg.get("mime") or "image/png").strip()
-
-    if path and os.path.isfile(path):
-        try:
-            # Für SVG kann man theoretisch auch ohne Base64 mit URL-Encoding einbetten,
-            # Base64 ist jedoch für E-Mail-HTML oft unkomplizierter.
-            with open(path, "rb") as f:
-                raw = f.read()
-            b64 = base64.b64encode(raw).decode("ascii")
-            return f"data:{mime};base64,{b64}"
-        except Exception:
-            return None
-
-    # Wenn du notfalls die (relative) URL direkt verwenden willst (nicht empfohlen für Mails),
-    # könntest du hier stattdessen cfg["url"] zurückgeben.
-    # return cfg.get("url")
-    return None
+    return get_logo_config(db)
 
 
 def embedded_logo():
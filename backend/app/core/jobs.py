@@ -5,62 +5,78 @@ from app.database import SessionLocal
 from app.models.jobs import Job
 from app.models.jobs_log import JobLog
 from app.models.webhooks import WebhookRecipient
-from app.core.email.send_email_report import send_email_report
-from app.core.webhook.send_webhook_report import send_webhook_report
-from app.core.generate_report_summary import generate_report_summary
-
-def run_due_jobs():
+from app.models.umami import Umami
+from app.models.sender import Sender
+from app.core.email.send_email_report import send_email_report, render_email_report
+from app.core.email.smtp_pool import smtp_pool
+from app.core.email.delivery import wait_all
+from app.core.webhook.send_webhook_report import send_webhook_report, render_webhook_report
+from app.core.delivery_outbox import OUTBOX_ENABLED, enqueue_delivery
+from app.core.delivery_ledger import load_successes
+from app.core.generate_report_summary import generate_report_summary, report_signature
+from app.core.scheduling import refresh_next_run_at, advance_next_run_at, is_missed_run
+
+def claim_due_jobs() -> list[dict]:
+    """
+    Selects all due jobs, advances their next_run_at and returns them grouped
+    by report signature, so jobs that need the same summary run together and
+    share one generation. Rows are locked with SKIP LOCKED, so concurrent
+    schedulers never claim the same run twice.
+    """
     db: Session = SessionLocal()
     now = datetime.utcnow()
 
-    run_daily_jobs(db, now)
-    run_weekly_jobs(db, now)
-    run_monthly_jobs(db, now)
-
-    db.close()
-
-def run_daily_jobs(db: Session, now: datetime):
-    lower_bound = (now - timedelta(seconds=30)).time()
-    upper_bound = (now + timedelta(seconds=30)).time()
-
-    jobs = db.query(Job).filter(
-        Job.is_active == True,
-        Job.frequency == "daily",
-        Job.execution_time >= lower_bound,
-        Job.execution_time <= upper_bound
-    ).all()
+    try:
+        schedule_unscheduled_jobs(db, now)
 
-    process_jobs(db, jobs, now.date())
+        jobs = db.query(Job).filter(
+            Job.is_active == True,
+            Job.next_run_at <= now
+        ).order_by(Job.next_run_at).with_for_update(skip_locked=True).all()
 
-def run_weekly_jobs(db: Session, now: datetime):
-    lower_bound = (now - timedelta(seconds=30)).time()
-    upper_bound = (now + timedelta(seconds=30)).time()
-    weekday = now.weekday()
+        groups: dict[tuple, list[dict]] = {}
+        for job in jobs:
+            if is_missed_run(job.next_run_at, now):
+                # Wie früher: verpasste Ausführungen werden übersprungen, nicht nachgeholt
+                print(f"⏭️  Skipping missed run of job {job.name} (scheduled for {job.next_run_at:%Y-%m-%d %H:%M} UTC)")
+            else:
+                groups.setdefault(report_signature(job), []).append({
+                    "job_id": str(job.id),
+                    "scheduled_for": job.next_run_at.isoformat(),
+                })
+            advance_next_run_at(job, now)
+        db.commit()
+
+        run_date = now.date().isoformat()
+        return [{"runs": runs, "run_date": run_date} for runs in groups.values()]
+    finally:
+        db.close()
+
+def run_scheduled_jobs(job_ids: list[str], run_date: date):
+    db: Session = SessionLocal()
 
+    try:
+        jobs = db.query(Job).filter(Job.id.in_(job_ids), Job.is_active == True).all()
+        order = {str(job_id): i for i, job_id in enumerate(job_ids)}
+        jobs.sort(key=lambda job: order.get(str(job.id), 0))
+        if jobs:
+            process_jobs(db, jobs, run_date, use_outbox=OUTBOX_ENABLED)
+    finally:
+        db.close()
+
+def schedule_unscheduled_jobs(db: Session, now: datetime):
+    """Backfills next_run_at for active jobs that have none yet (e.g. rows created before the column existed)."""
     jobs = db.query(Job).filter(
         Job.is_active == True,
-        Job.frequency == "weekly",
-        Job.day == weekday,
-        Job.execution_time >= lower_bound,
-        Job.execution_time <= upper_bound
+        Job.next_run_at == None
     ).all()
 
-    process_jobs(db, jobs, now.date())
-
-def run_monthly_jobs(db: Session, now: datetime):
-    lower_bound = (now - timedelta(seconds=30)).time()
-    upper_bound = (now + timedelta(seconds=30)).time()
-    today = now.day
+    if not jobs:
+        return
 
-    jobs = db.query(Job).filter(
-        Job.is_active == True,
-        Job.frequency == "monthly",
-        Job.day == today,
-        Job.execution_time >= lower_bound,
-        Job.execution_time <= upper_bound
-    ).all()
-
-    process_jobs(db, jobs, now.date())
+    for job in jobs:
+        refresh_next_run_at(job, now)
+    db.commit()
 
 """
 def process_jobs(db: Session, jobs: list[Job], today: date):
@@ -174,10 +190,60 @@ def process_jobs(db: Session, jobs: list[Job], today: date):
 
 
 
+import copy
+from contextlib import ExitStack
+from dataclasses import dataclass
 from datetime import datetime, date
 from sqlalchemy.orm import Session
 
-from app.utils.logging import job_log_context, add_log_detail
+from app.utils.logging import job_log_context, add_log_detail, JobLogWriter
+
+@dataclass
+class _Prefetched:
+    umami: dict
+    senders: dict
+    webhooks: dict
+
+def _prefetch(db: Session, jobs: list) -> _Prefetched:
+    """
+    Loads the Umami instances, senders and webhooks of all jobs in three
+    queries. The objects are detached, so the per-job commits of the job log
+    don't expire them and trigger a reload each.
+    """
+    umami_ids = {job.umami_id for job in jobs if job.umami_id}
+    mailer_ids = {job.mailer_id for job in jobs if job.mailer_id}
+    webhook_ids = {wh_id for job in jobs for wh_id in (job.webhook_recipients or [])}
+
+    def load(model, ids) -> dict:
+        if not ids:
+            return {}
+        rows = db.query(model).filter(model.id.in_(ids)).all()
+        for row in rows:
+            db.expunge(row)
+        return {str(row.id): row for row in rows}
+
+    return _Prefetched(
+        umami=load(Umami, umami_ids),
+        senders=load(Sender, mailer_ids),
+        webhooks=load(WebhookRecipient, webhook_ids),
+    )
+
+def _shared_report_summary(db: Session, job: Job, summaries: dict, instance: Umami = None) -> dict:
+    """Generates each distinct summary once per call of process_jobs; every job gets its own copy."""
+    key = report_signature(job)
+    if key not in summaries:
+        try:
+            summaries[key] = generate_report_summary(db, job, instance=instance)
+        except Exception as e:
+            summaries[key] = e
+
+    shared = summaries[key]
+    if isinstance(shared, Exception):
+        raise shared
+
+    summary = copy.deepcopy(shared)
+    summary["name"] = job.name
+    return summary
 
 def process_jobs(
     db: Session,
@@ -185,105 +251,156 @@ def process_jobs(
     today: date,
     *,
     force_send: bool = False,
-    triggered_by: str = None
+    triggered_by: str = None,
+    use_outbox: bool = False
 ) -> None:
+    """
+    Runs the given jobs. With use_outbox the rendered deliveries are stored in
+    delivery_outbox instead of being sent; drain_outbox() delivers them.
+    """
     start_of_day = datetime(today.year, today.month, today.day)
+    summaries: dict = {}
 
-    for job in jobs:
-        tb = triggered_by if triggered_by else ("system" if not force_send else "user")
-        with job_log_context(db, job_id=job.id, triggered_by=tb) as log:
-            webhook_channels = []
-            if job.webhook_recipients:
-                webhook_objects = db.query(WebhookRecipient).filter(
-                    WebhookRecipient.id.in_(job.webhook_recipients)
-                ).all()
-                webhook_channels = [wh for wh in webhook_objects]
-
-            if not force_send:
-                mail_sent = db.query(JobLog).filter(
-                    JobLog.job_id == job.id,
-                    JobLog.finished_at >= start_of_day,
-                    JobLog.status.in_(["success", "warning"]),
-                    JobLog.triggered_by == "system"
-                ).first()
-
-                unsent_webhooks = []
-                if webhook_channels:
-                    todays_logs = db.query(JobLog).filter(
-                        JobLog.job_id == job.id,
-                        JobLog.finished_at >= start_of_day
-                    ).all()
-
-                    def channel_had_success_today(ch: str, target_id: str) -> bool:
-                        for l in todays_logs:
-                            for d in (l.details or []):
-                                if (
-                                    d.get("channel") == ch
-                                    and str(d.get("target_id")) == str(target_id)
-                                    and d.get("status") == "success"
-                                ):
-                                    return True
-                        return False
-
-                    for wh in webhook_channels:
-                        if not channel_had_success_today(wh.type, wh.id):
-                            unsent_webhooks.append(wh)
-
-                if mail_sent and not unsent_webhooks:
-                    add_log_detail(log, channel="GLOBAL", target_id=None, status="skipped", error="Nothing to send: already completed for today."
-                    )
-                    continue
-            else:
-                unsent_webhooks = webhook_channels[:]
+    try:
+        _process_jobs(db, jobs, start_of_day, summaries, force_send=force_send, triggered_by=triggered_by, use_outbox=use_outbox)
+    finally:
+        # Connections stay pooled for the following jobs; only drop the stale ones.
+        smtp_pool.close_idle()
 
+def _process_jobs(
+    db: Session,
+    jobs: list,
+    start_of_day: datetime,
+    summaries: dict,
+    *,
+    force_send: bool,
+    triggered_by: str,
+    use_outbox: bool
+) -> None:
+    ledger = {} if force_send else load_successes(db, [job.id for job in jobs], start_of_day.date())
+    prefetched = _prefetch(db, jobs)
+
+    # Logs werden gepuffert und gebündelt geschrieben; offene Logs (Mailversand läuft) schließen vor dem letzten Flush
+    with JobLogWriter(db) as writer, ExitStack() as open_logs:
+        pending_emails = []
+        for job in jobs:
+            _process_job(db, job, start_of_day, summaries, ledger, prefetched, writer, open_logs, pending_emails,
+                         force_send=force_send, triggered_by=triggered_by, use_outbox=use_outbox)
+
+        # Mails laufen parallel zu den folgenden Jobs; erst hier auf die Zustellung warten
+        for log, mailer_id, deliveries in pending_emails:
             try:
-                summary = generate_report_summary(db, job)
+                wait_all(deliveries)
+                add_log_detail(log, channel="EMAIL", target_id=mailer_id, status="success", error=None)
             except Exception as e:
-                add_log_detail(log, channel="GLOBAL", target_id=None, status="failed", error=str(e))
-                continue
+                add_log_detail(log, channel="EMAIL", target_id=mailer_id, status="failed", error=str(e))
 
-            if job.mailer_id:
-                if force_send:
-                    should_send_email = True
-                else:
-                    todays_logs = db.query(JobLog).filter(
-                        JobLog.job_id == job.id,
-                        JobLog.finished_at >= start_of_day,
-                        JobLog.triggered_by == "system"
-                    ).all()
-                    already_sent_email_today = any(
-                        any(
-                            d.get("channel") == "EMAIL" and d.get("status") == "success"
-                            for d in (l.details or [])
-                        )
-                        for l in todays_logs
-                    )
-                    should_send_email = not already_sent_email_today
-
-                if should_send_email:
-                    try:
-                        send_email_report(db, job, summary)
-                        add_log_detail(log, channel="EMAIL", target_id=job.mailer_id, status="success", error=None)
-                    except Exception as e:
-                        msg = str(e)
-                        if "skipped|" in msg:
-                            add_log_detail(log, channel="EMAIL", target_id=job.mailer_id, status="skipped",
-                                           error=msg.replace("skipped|", ""))
-                        else:
-                            add_log_detail(log, channel="EMAIL", target_id=job.mailer_id, status="failed", error=msg)
-                else:
-                    add_log_detail(log, channel="EMAIL", target_id=job.mailer_id, status="skipped", error="Email already sent today.")
+def _process_job(
+    db: Session,
+    job,
+    start_of_day: datetime,
+    summaries: dict,
+    ledger: dict,
+    prefetched: _Prefetched,
+    writer: JobLogWriter,
+    open_logs: ExitStack,
+    pending_emails: list,
+    *,
+    force_send: bool,
+    triggered_by: str,
+    use_outbox: bool
+) -> None:
+    tb = triggered_by if triggered_by else ("system" if not force_send else "user")
+    with ExitStack() as job_scope:
+        log = job_scope.enter_context(job_log_context(db, job_id=job.id, triggered_by=tb, writer=writer))
+        webhook_channels = [
+            prefetched.webhooks[str(wh_id)]
+            for wh_id in (job.webhook_recipients or [])
+            if str(wh_id) in prefetched.webhooks
+        ]
+
+        if not force_send:
+            # Ledger des Tages (für alle Jobs des Laufs vorab geladen)
+            sent_today = ledger.get(str(job.id), set())
+            mail_sent = any(triggered == "system" for _, _, triggered in sent_today)
+
+            unsent_webhooks = [
+                wh for wh in webhook_channels
+                if not any(ch == wh.type and target == str(wh.id) for ch, target, _ in sent_today)
+            ]
+
+            if mail_sent and not unsent_webhooks:
+                add_log_detail(log, channel="GLOBAL", target_id=None, status="skipped", error="Nothing to send: already completed for today."
+                )
+                return
+        else:
+            unsent_webhooks = webhook_channels[:]
+
+        try:
+            summary = _shared_report_summary(db, job, summaries, instance=prefetched.umami.get(str(job.umami_id)))
+        except Exception as e:
+            add_log_detail(log, channel="GLOBAL", target_id=None, status="failed", error=str(e))
+            return
 
-            # --- WEBHOOKS ---
-            targets = webhook_channels if force_send else unsent_webhooks
-            for webhook in targets:
+        if job.mailer_id:
+            if force_send:
+                should_send_email = True
+            else:
+                already_sent_email_today = any(
+                    ch == "EMAIL" and triggered == "system" for ch, _, triggered in sent_today
+                )
+                should_send_email = not already_sent_email_today
+
+            if should_send_email:
                 try:
-                    send_webhook_report(db, job, summary, webhook)
-                    add_log_detail(log, channel=webhook.type, target_id=webhook.id, status="success", error=None)
+                    if use_outbox:
+                        _, message = render_email_report(db, job, summary, sender=prefetched.senders.get(str(job.mailer_id)))
+                        enqueue_delivery(db, log, job_id=job.id, run_date=start_of_day.date(), channel="EMAIL",
+                                         target_id=job.mailer_id, payload=message,
+                                         meta={"recipients": list(job.email_recipients)})
+                    else:
+                        deliveries = send_email_report(db, job, summary, wait=False,
+                                                       sender=prefetched.senders.get(str(job.mailer_id)))
+                        pending_emails.append((log, job.mailer_id, deliveries))
                 except Exception as e:
                     msg = str(e)
                     if "skipped|" in msg:
-                        add_log_detail(log, channel=webhook.type, target_id=webhook.id, status="skipped",
+                        add_log_detail(log, channel="EMAIL", target_id=job.mailer_id, status="skipped",
                                        error=msg.replace("skipped|", ""))
                     else:
-                        add_log_detail(log, channel=webhook.type, target_id=webhook.id, status="failed", error=msg)
+                        add_log_detail(log, channel="EMAIL", target_id=job.mailer_id, status="failed", error=msg)
+            else:
+                add_log_detail(log, channel="EMAIL", target_id=job.mailer_id, status="skipped", error="Email already sent today.")
+
+        # --- WEBHOOKS ---
+        targets = webhook_channels if force_send else unsent_webhooks
+        # Rendern hier (Session), posten parallel über den Dispatcher
+        posts = []
+        for webhook in targets:
+            try:
+                if use_outbox:
+                    body = render_webhook_report(db, job, summary, webhook)
+                    enqueue_delivery(db, log, job_id=job.id, run_date=start_of_day.date(), channel=webhook.type,
+                                     target_id=webhook.id, payload=body)
+                else:
+                    posts.append((webhook, send_webhook_report(db, job, summary, webhook, wait=False)))
+            except Exception as e:
+                posts.append((webhook, e))
+
+        for webhook, post in posts:
+            try:
+                if isinstance(post, Exception):
+                    raise post
+                post.result()
+                add_log_detail(log, channel=webhook.type, target_id=webhook.id, status="success", error=None)
+            except Exception as e:
+                msg = str(e)
+                if "skipped|" in msg:
+                    add_log_detail(log, channel=webhook.type, target_id=webhook.id, status="skipped",
+                                   error=msg.replace("skipped|", ""))
+                else:
+                    add_log_detail(log, channel=webhook.type, target_id=webhook.id, status="failed", error=msg)
+
+        if any(entry[0] is log for entry in pending_emails):
+            # Log bleibt offen, bis der Mailversand abgeschlossen ist
+            open_logs.enter_context(job_scope.pop_all())
@@ -0,0 +1,150 @@
+import base64
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from email import encoders
+from email.mime.image import MIMEImage
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.system_settings import SystemSettings
+
+DEFAULT_LOGO_PATH = os.path.join(os.path.dirname(__file__), "default_logo.png")
+DEFAULT_LOGO_MIME = "image/png"
+LOGO_CID = "logo_cid"
+# How long a process reuses the LOGO setting before reading it again (uploads in
+# this process invalidate it immediately).
+LOGO_CHECK_SECONDS = float(os.getenv("LOGO_CHECK_SECONDS", "60"))
+
+
+@dataclass(frozen=True)
+class LogoAsset:
+    """A logo file read once per process, with the encodings used by mails, previews and the branding endpoint."""
+    path: str
+    mime: str
+    data: bytes
+    mtime_ns: int
+    sha256: Optional[str] = None
+    data_url: str = field(init=False, repr=False)
+    mime_body: str = field(init=False, repr=False)
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1_000_000_000
+
+    def __post_init__(self):
+        b64 = base64.b64encode(self.data).decode("ascii")
+        object.__setattr__(self, "data_url", f"data:{self.mime};base64,{b64}")
+        # Base64-Body wie encoders.encode_base64 (76er-Zeilen), nur einmal kodiert
+        object.__setattr__(self, "mime_body", base64.encodebytes(self.data).decode("ascii"))
+
+    def mime_part(self) -> MIMEImage:
+        """A new inline image part for one message; parts are never shared between messages."""
+        img = MIMEImage(b"", _subtype=self.mime.split("/")[-1], _encoder=encoders.encode_noop)
+        img.set_payload(self.mime_body)
+        img["Content-Transfer-Encoding"] = "base64"
+        img.add_header("Content-ID", f"<{LOGO_CID}>")
+        img.add_header("Content-Disposition", "inline", filename=os.path.basename(self.path))
+        return img
+
+
+_assets: Dict[str, LogoAsset] = {}
+_config: Optional[Tuple[float, Optional[Dict]]] = None
+_lock = threading.Lock()
+
+
+def invalidate_logo_assets() -> None:
+    """Drops all cached logos and the cached LOGO setting of this process (after a logo upload or delete)."""
+    global _config
+    with _lock:
+        _assets.clear()
+        _config = None
+
+
+def load_logo_asset(path: Optional[str], mime: Optional[str] = None, sha256: Optional[str] = None) -> Optional[LogoAsset]:
+    """
+    Returns the cached asset for a logo file, or None if the file can't be read.
+    Keyed by the sha256 of the LOGO setting (a cached hit doesn't touch the
+    file); files without hash (default logo) are keyed by path and modification time.
+    """
+    if not path:
+        return None
+    mime = mime or DEFAULT_LOGO_MIME
+    if sha256:
+        # Inhalt über den Hash identifiziert: Treffer ohne stat()
+        key = f"sha256:{sha256}:{mime}"
+        with _lock:
+            asset = _assets.get(key)
+        if asset is not None:
+            return asset
+
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    if not sha256:
+        key = f"file:{path}:{mtime_ns}:{mime}"
+        with _lock:
+            asset = _assets.get(key)
+        if asset is not None:
+            return asset
+
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    asset = LogoAsset(path=path, mime=mime, data=data, mtime_ns=mtime_ns, sha256=sha256)
+    with _lock:
+        # Nur das aktuelle Logo und das Default-Logo halten
+        if len(_assets) >= 4:
+            _assets.clear()
+        _assets[key] = asset
+    return asset
+
+
+def get_logo_config(db: Session) -> Optional[Dict]:
+    """Liest die LOGO-Config aus SystemSettings (JSONB)."""
+    row = db.query(SystemSettings).filter(SystemSettings.type == "LOGO").one_or_none()
+    if not row:
+        return None
+
+    value = getattr(row, "config", None) or getattr(row, "value", None)
+    if not isinstance(value, dict):
+        return None
+    return value
+
+
+def _cached_logo_config(db: Session) -> Optional[Dict]:
+    global _config
+    now = time.monotonic()
+    with _lock:
+        cached = _config
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    cfg = get_logo_config(db)
+    with _lock:
+        _config = (now + LOGO_CHECK_SECONDS, cfg)
+    return cfg
+
+
+def get_logo_asset(db: Session) -> Optional[LogoAsset]:
+    """
+    The uploaded logo, or None if none is configured or its file is gone.
+    The LOGO setting is read at most every LOGO_CHECK_SECONDS.
+    """
+    cfg = _cached_logo_config(db)
+    if not cfg:
+        return None
+    path = (cfg.get("path") or "").strip()
+    mime = (cfg.get("mime") or DEFAULT_LOGO_MIME).strip()
+    return load_logo_asset(path, mime, cfg.get("sha256"))
+
+
+def default_logo_asset() -> Optional[LogoAsset]:
+    return load_logo_asset(DEFAULT_LOGO_PATH, DEFAULT_LOGO_MIME)
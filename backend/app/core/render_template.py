@@ -1,7 +1,39 @@
 # app/core/mail_template.py
 
-from jinja2 import Template
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from jinja2 import Environment, Template
+
+TEMPLATE_CACHE_SIZE = int(os.getenv("TEMPLATE_CACHE_SIZE", "128"))
+
+_env = Environment()
+_compiled: "OrderedDict[str, Template]" = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def get_compiled_template(template_str: str) -> Template:
+    """Returns the compiled template for the given source, compiling it only on a cache miss (LRU by content hash)."""
+    key = hashlib.sha256(template_str.encode("utf-8")).hexdigest()
+
+    with _compiled_lock:
+        template = _compiled.get(key)
+        if template is not None:
+            _compiled.move_to_end(key)
+            return template
+
+    template = _env.from_string(template_str)
+
+    with _compiled_lock:
+        _compiled[key] = template
+        _compiled.move_to_end(key)
+        while len(_compiled) > TEMPLATE_CACHE_SIZE:
+            _compiled.popitem(last=False)
+    return template
+
 
 def render_template(template_str: str, context: dict) -> str:
-    template = Template(template_str)
-    return template.render(**context)
\ No newline at end of file
+    template = get_compiled_template(template_str)
+    return template.render(**context)
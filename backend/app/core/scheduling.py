@@ -0,0 +1,103 @@
+import calendar
+import os
+from datetime import datetime, date, time, timedelta
+from typing import Optional
+
+from app.models.jobs import Job, Frequency
+
+# Jobs are picked up when next_run_at <= now; the grace window keeps a job that
+# is saved a few seconds after its execution time due for the current minute
+# (same tolerance as the former ±30 s window scans).
+SCHEDULE_GRACE = timedelta(seconds=30)
+# Runs that are overdue by more than this (scheduler or worker down) are skipped
+# instead of fired late; the tolerance only absorbs queueing delays of the beat tick.
+MISSED_RUN_TOLERANCE = timedelta(seconds=int(os.getenv("SCHEDULER_MISSED_RUN_SECONDS", "300")))
+# next_run_at of active jobs whose configuration can't be scheduled (e.g. weekly
+# without a valid day). Never due, and not NULL, so the backfill doesn't pick them
+# up again on every tick; editing the job recalculates it.
+UNSCHEDULABLE = datetime(9999, 12, 31)
+
+
+def _as_time(value) -> Optional[time]:
+    if value is None:
+        return None
+    if isinstance(value, time):
+        return value
+    if isinstance(value, str):
+        return time.fromisoformat(value)
+    return None
+
+
+def _monthly_run_date(year: int, month: int, day: int) -> date:
+    last_day = calendar.monthrange(year, month)[1]
+    return date(year, month, min(day, last_day))
+
+
+def compute_next_run_at(
+    frequency,
+    day: Optional[int],
+    execution_time,
+    after: datetime,
+) -> Optional[datetime]:
+    """Returns the first scheduled run (UTC, naive) that is >= `after`, or None if the job can't be scheduled."""
+    exec_time = _as_time(execution_time)
+    if exec_time is None:
+        return None
+
+    if frequency == Frequency.daily:
+        candidate = datetime.combine(after.date(), exec_time)
+        if candidate < after:
+            candidate += timedelta(days=1)
+        return candidate
+
+    if frequency == Frequency.weekly:
+        if day is None or not 0 <= day <= 6:
+            return None
+        days_ahead = (day - after.weekday()) % 7
+        candidate = datetime.combine(after.date() + timedelta(days=days_ahead), exec_time)
+        if candidate < after:
+            candidate += timedelta(days=7)
+        return candidate
+
+    if frequency == Frequency.monthly:
+        if day is None or not 1 <= day <= 31:
+            return None
+        year, month = after.year, after.month
+        candidate = datetime.combine(_monthly_run_date(year, month, day), exec_time)
+        if candidate < after:
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+            candidate = datetime.combine(_monthly_run_date(year, month, day), exec_time)
+        return candidate
+
+    return None
+
+
+def _next_or_unschedulable(job: Job, after: datetime) -> datetime:
+    next_run = compute_next_run_at(job.frequency, job.day, job.execution_time, after)
+    if next_run is None:
+        print(f"⚠️  Job {job.name} ({job.id}) can't be scheduled (frequency={job.frequency}, day={job.day}, "
+              f"execution_time={job.execution_time}), it won't run until it is edited")
+        return UNSCHEDULABLE
+    return next_run
+
+
+def refresh_next_run_at(job: Job, now: Optional[datetime] = None) -> None:
+    """Recalculates job.next_run_at from its schedule. Inactive jobs get no next run."""
+    if not job.is_active:
+        job.next_run_at = None
+        return
+    now = now or datetime.utcnow()
+    job.next_run_at = _next_or_unschedulable(job, now - SCHEDULE_GRACE)
+
+
+def advance_next_run_at(job: Job, now: datetime) -> None:
+    """Moves job.next_run_at past `now` after the scheduler handled the job."""
+    if not job.is_active:
+        job.next_run_at = None
+        return
+    job.next_run_at = _next_or_unschedulable(job, now + SCHEDULE_GRACE)
+
+
+def is_missed_run(scheduled_for: datetime, now: datetime) -> bool:
+    """True if a due run is too old to be sent (the scheduler was down at its time)."""
+    return scheduled_for < now - MISSED_RUN_TOLERANCE
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.template import MailTemplate
+
+# How often the registry checks the templates table for changes made by other
+# processes (template import, PUT /templates/{id}).
+CHECK_INTERVAL_SECONDS = float(os.getenv("TEMPLATE_REGISTRY_CHECK_SECONDS", "30"))
+
+
+@dataclass(frozen=True)
+class CachedTemplate:
+    id: str
+    type: str
+    sender_type: str
+    content: Optional[str]
+    content_hash: Optional[str]
+    updated_at: Optional[datetime]
+    # Hash of content itself; content_hash is only maintained by the template import
+    source_hash: str
+
+
+_templates: dict[tuple[str, str], Optional[CachedTemplate]] = {}
+_version: Optional[tuple] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def invalidate_templates() -> None:
+    """Drops all cached templates of this process."""
+    global _version, _checked_at
+    with _lock:
+        _templates.clear()
+        _version = None
+        _checked_at = 0.0
+
+
+def _table_version(db: Session) -> tuple:
+    count, last_update = db.query(func.count(MailTemplate.id), func.max(MailTemplate.updated_at)).one()
+    return count, last_update
+
+
+def _ensure_fresh(db: Session) -> None:
+    global _version, _checked_at
+    now = time.monotonic()
+    if now - _checked_at < CHECK_INTERVAL_SECONDS and _version is not None:
+        return
+
+    version = _table_version(db)
+    with _lock:
+        if version != _version:
+            _templates.clear()
+            _version = version
+        _checked_at = now
+
+
+def get_template(db: Session, type: str, sender_type: str) -> Optional[CachedTemplate]:
+    """Returns the template for (type, sender_type), loading it from the database only once per process."""
+    _ensure_fresh(db)
+
+    key = (type, sender_type)
+    with _lock:
+        if key in _templates:
+            return _templates[key]
+
+    row = db.query(MailTemplate).filter_by(type=type, sender_type=sender_type).first()
+    cached = None
+    if row:
+        cached = CachedTemplate(
+            id=str(row.id),
+            type=row.type,
+            sender_type=row.sender_type,
+            content=row.content,
+            content_hash=row.content_hash,
+            updated_at=row.updated_at,
+            source_hash=hashlib.sha256((row.content or "").encode("utf-8")).hexdigest(),
+        )
+
+    with _lock:
+        _templates[key] = cached
+    return cached
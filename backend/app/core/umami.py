@@ -1,6 +1,9 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor, Executor
 from datetime import datetime, timedelta
-from app.models.umami import UmamiType, Umami
+from typing import Optional
+from app.models.umami import Umami
+from app.core.umami_client import get_umami_client, MAX_CONCURRENCY
+from app.core.umami_cache import cached_fetch, cache_key
 from app.models.jobs import Job, Frequency
 from app.utils.helper import convertUTM
 
@@ -18,26 +21,35 @@ def fetch_website_summary(instance: Umami, job: Job):
     startAt = int(start.timestamp() * 1000)
     endAt = int(end.timestamp() * 1000)
 
-    if "stats" in job.summary_items:
-        stats = fetch_website_stats(instance, job.website_id, startAt=startAt, endAt=endAt)
-        pageviews = stats.get("pageviews", {}).get("value", "-")
-        visitors = stats.get("visitors", {}).get("value", "-")
-        visits = stats.get("visits", {}).get("value", "-")
-        bounces = stats.get("bounces", {}).get("value", "-")
-        bounces = calculateBounceRate(visits, bounces)
-        totaltime = stats.get("totaltime", {}).get("value", "-")
-        totaltime = calculateTotaltime(totaltime)
-        stats = {
-            "pageviews": pageviews,
-            "visitors": visitors,
-            "visits": visits,
-            "bounces": bounces,
-            "totaltime": totaltime
-        }
-    else:
-        stats = {}
-
-    metrics = collect_metrics(instance, job, startAt, endAt)
+    metric_keys = [key for key in job.summary_items if key != "stats"]
+    workers = max(1, min(MAX_CONCURRENCY, len(metric_keys) + 1))
+
+    # Stats and every metric are independent requests; run them side by side.
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        stats_future = None
+        if "stats" in job.summary_items:
+            stats_future = executor.submit(fetch_website_stats, instance, job.website_id, startAt=startAt, endAt=endAt)
+
+        metrics = collect_metrics(instance, job, startAt, endAt, executor=executor)
+
+        if stats_future is not None:
+            stats = stats_future.result()
+            pageviews = stats.get("pageviews", {}).get("value", "-")
+            visitors = stats.get("visitors", {}).get("value", "-")
+            visits = stats.get("visits", {}).get("value", "-")
+            bounces = stats.get("bounces", {}).get("value", "-")
+            bounces = calculateBounceRate(visits, bounces)
+            totaltime = stats.get("totaltime", {}).get("value", "-")
+            totaltime = calculateTotaltime(totaltime)
+            stats = {
+                "pageviews": pageviews,
+                "visitors": visitors,
+                "visits": visits,
+                "bounces": bounces,
+                "totaltime": totaltime
+            }
+        else:
+            stats = {}
 
     returnObject = {
         "stats": stats,
@@ -51,45 +63,43 @@ def fetch_website_summary(instance: Umami, job: Job):
     return returnObject
 
 def fetch_website_stats(instance: Umami, website_id: str, startAt, endAt):
-    headers = {}
+    def load():
+        client = get_umami_client(instance)
+        response = client.get(f"/websites/{website_id}/stats", params={"startAt": startAt, "endAt": endAt})
+        return response.json(), response.status_code == 200
 
-    if instance.type == UmamiType.cloud:
-        hostname = "https://api.umami.is/v1"
-        headers['x-umami-api-key'] = instance.api_key
-    else:
-        hostname = instance.hostname + "/api"
-        headers['Authorization'] = f"Bearer {instance.bearer_token}"
-
-    url = f"{hostname}/websites/{website_id}/stats?startAt={startAt}&endAt={endAt}"
-    response = requests.get(url, headers=headers)
-    return response.json()
+    return cached_fetch(cache_key(instance.id, website_id, "stats", None, startAt, endAt), load)
 
 def fetch_website_metrics(instance: Umami, website_id: str, startAt, endAt, metric_type="pageviews"):
-    headers = {}
-
-    if instance.type == UmamiType.cloud:
-        hostname = "https://api.umami.is/v1"
-        headers['x-umami-api-key'] = instance.api_key
-    else:
-        hostname = instance.hostname + "/api"
-        headers['Authorization'] = f"Bearer {instance.bearer_token}"
-
-    url = f"{hostname}/websites/{website_id}/metrics?startAt={startAt}&endAt={endAt}&type={metric_type}"
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        data = response.json()
-        filtered = [item for item in data if item.get("y", 0) > 0]
-        return filtered[:5]
-    else:
-        return []
-
-def collect_metrics(instance, job, startAt, endAt):
-    return {
-        key: fetch_website_metrics(instance, job.website_id, startAt=startAt, endAt=endAt, metric_type=key)
-        if key in job.summary_items else []
-        for key in job.summary_items
-        if key != "stats"
+    def load():
+        client = get_umami_client(instance)
+        response = client.get(
+            f"/websites/{website_id}/metrics",
+            params={"startAt": startAt, "endAt": endAt, "type": metric_type}
+        )
+        if response.status_code == 200:
+            data = response.json()
+            filtered = [item for item in data if item.get("y", 0) > 0]
+            return filtered[:5], True
+        else:
+            return [], False
+
+    return cached_fetch(cache_key(instance.id, website_id, "metrics", metric_type, startAt, endAt), load)
+
+def collect_metrics(instance, job, startAt, endAt, executor: Optional[Executor] = None):
+    keys = [key for key in job.summary_items if key != "stats"]
+    if not keys:
+        return {}
+
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_CONCURRENCY, len(keys)))) as own_executor:
+            return collect_metrics(instance, job, startAt, endAt, executor=own_executor)
+
+    futures = {
+        key: executor.submit(fetch_website_metrics, instance, job.website_id, startAt=startAt, endAt=endAt, metric_type=key)
+        for key in keys
     }
+    return {key: future.result() for key, future in futures.items()}
 
 
 def parseTime(totaltime):
@@ -156,33 +166,20 @@ def fetch_report_summary(instance: Umami, job: Job):
 
 
 def fetchReportInfo(instance: Umami, report_id: str):
-    headers = {}
-
-
-    if instance.type == UmamiType.cloud:
-        hostname = "https://api.umami.is/v1"
-        headers['x-umami-api-key'] = instance.api_key
-    else:
-        hostname = instance.hostname + "/api"
-        headers['Authorization'] = f"Bearer {instance.bearer_token}"
-
-    url = f"{hostname}/reports/{report_id}"
-    response = requests.get(url, headers=headers)
+    client = get_umami_client(instance)
+    response = client.get(f"/reports/{report_id}")
     return response.json()
 
 def runReport(instance, type, parameters):
-    headers = {}
-
-    if instance.type == UmamiType.cloud:
-        hostname = "https://api.umami.is/v1"
-        headers['x-umami-api-key'] = instance.api_key
-    else:
-        hostname = instance.hostname + "/api"
-        headers['Authorization'] = f"Bearer {instance.bearer_token}"
-
-    url = f"{hostname}/reports/{type}"
-    response = requests.post(url, headers=headers, json=parameters)
-    return response.json()
+    def load():
+        client = get_umami_client(instance)
+        response = client.post(f"/reports/{type}", json=parameters)
+        return response.json(), response.status_code == 200
+
+    # Report parameters use relative date ranges, so the key is bucketed by the current time.
+    now_ms = int(datetime.utcnow().timestamp() * 1000)
+    key = cache_key(instance.id, parameters.get("websiteId"), f"reports/{type}", None, None, now_ms, params=parameters)
+    return cached_fetch(key, load)
 
 
 
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Callable, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+from app.utils.feature_flags import env_bool
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+CACHE_ENABLED = env_bool("UMAMI_CACHE_ENABLED", True)
+CACHE_TTL_SECONDS = int(os.getenv("UMAMI_CACHE_TTL_SECONDS", "600"))
+# startAt/endAt are rounded down to this bucket, so jobs that ask for the same
+# window a few seconds apart share one entry.
+CACHE_BUCKET_SECONDS = max(1, int(os.getenv("UMAMI_CACHE_BUCKET_SECONDS", "300")))
+CACHE_MAX_ENTRIES = int(os.getenv("UMAMI_CACHE_MAX_ENTRIES", "5000"))
+CACHE_MAX_ENTRY_BYTES = int(os.getenv("UMAMI_CACHE_MAX_ENTRY_BYTES", str(512_000)))
+# While one worker fetches a missing entry, others wait up to this long for it.
+CACHE_WAIT_SECONDS = float(os.getenv("UMAMI_CACHE_WAIT_SECONDS", "10"))
+
+KEY_PREFIX = "umamisender:umami-cache:"
+INDEX_KEY = "umamisender:umami-cache-index"
+LOCK_PREFIX = "umamisender:umami-cache-lock:"
+
+_client = None
+
+
+def _redis():
+    global _client
+    if not CACHE_ENABLED or redis is None:
+        return None
+    if _client is None:
+        _client = redis.Redis.from_url(REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+    return _client
+
+
+def _bucket(ms: Optional[int]) -> Optional[int]:
+    if ms is None:
+        return None
+    size = CACHE_BUCKET_SECONDS * 1000
+    return (int(ms) // size) * size
+
+
+def cache_key(
+    instance_id,
+    website_id: Optional[str],
+    endpoint: str,
+    metric_type: Optional[str] = None,
+    startAt: Optional[int] = None,
+    endAt: Optional[int] = None,
+    params: Optional[dict] = None,
+) -> str:
+    """Builds the cache key for one Umami API response."""
+    parts = [
+        str(instance_id),
+        website_id or "-",
+        endpoint,
+        metric_type or "-",
+        str(_bucket(startAt)) if startAt is not None else "-",
+        str(_bucket(endAt)) if endAt is not None else "-",
+    ]
+    if params is not None:
+        parts.append(hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16])
+    return KEY_PREFIX + ":".join(parts)
+
+
+def _get(client, key: str) -> Optional[Any]:
+    raw = client.get(key)
+    if raw is None:
+        return None
+    client.zadd(INDEX_KEY, {key: time.time()})
+    return json.loads(raw)
+
+
+def _set(client, key: str, value: Any) -> None:
+    raw = json.dumps(value)
+    if len(raw) > CACHE_MAX_ENTRY_BYTES:
+        return
+
+    now = time.time()
+    pipe = client.pipeline()
+    pipe.set(key, raw, ex=CACHE_TTL_SECONDS)
+    pipe.zadd(INDEX_KEY, {key: now})
+    pipe.zremrangebyscore(INDEX_KEY, 0, now - CACHE_TTL_SECONDS)
+    pipe.zcard(INDEX_KEY)
+    size = pipe.execute()[-1]
+
+    # Evict the least recently used entries once the cache grows too large.
+    overflow = size - CACHE_MAX_ENTRIES
+    if overflow > 0:
+        evicted = [k for k, _ in client.zpopmin(INDEX_KEY, overflow)]
+        if evicted:
+            client.delete(*evicted)
+
+
+def cached_fetch(key: str, loader: Callable[[], tuple[Any, bool]]) -> Any:
+    """
+    Returns the cached value for `key` or calls `loader`, which returns
+    (value, cacheable). Falls back to the loader whenever Redis is unavailable.
+    """
+    client = _redis()
+    if client is None:
+        return loader()[0]
+
+    lock_key = LOCK_PREFIX + key[len(KEY_PREFIX):]
+    owns_lock = False
+    try:
+        value = _get(client, key)
+        if value is not None:
+            return value
+
+        owns_lock = bool(client.set(lock_key, "1", nx=True, ex=max(1, int(CACHE_WAIT_SECONDS * 3))))
+        if not owns_lock:
+            # Another worker is fetching the same response; wait for its result.
+            deadline = time.monotonic() + CACHE_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(0.2)
+                value = _get(client, key)
+                if value is not None:
+                    return value
+                if not client.exists(lock_key):
+                    break
+    except Exception as e:
+        print(f"⚠️  Umami cache unavailable: {e}")
+        return loader()[0]
+
+    try:
+        value, cacheable = loader()
+        if cacheable:
+            try:
+                _set(client, key, value)
+            except Exception as e:
+                print(f"⚠️  Umami cache write failed: {e}")
+        return value
+    finally:
+        if owns_lock:
+            try:
+                client.delete(lock_key)
+            except Exception:
+                pass
@@ -0,0 +1,81 @@
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.models.umami import Umami, UmamiType
+
+CLOUD_HOSTNAME = os.getenv("CLOUD_HOSTNAME", "https://api.umami.is/v1")
+CONNECT_TIMEOUT = float(os.getenv("UMAMI_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("UMAMI_READ_TIMEOUT", "30"))
+POOL_SIZE = int(os.getenv("UMAMI_POOL_SIZE", "10"))
+# Upper bound of simultaneous requests against one instance (per process), so
+# parallel fetching doesn't overload a small self-hosted Umami.
+MAX_CONCURRENCY = max(1, int(os.getenv("UMAMI_MAX_CONCURRENCY", "4")))
+
+USER_AGENT = "UmamiSender/1.0 (+https://github.com/ceviixx/umami-sender)"
+
+
+class UmamiClient:
+    """Keep-alive HTTP client for one Umami instance (pooled connections, default timeouts, concurrency cap)."""
+
+    def __init__(self, base_url: str, headers: dict):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers
+        self.timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+        self._slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT, **headers})
+
+    def get(self, path: str, params: Optional[dict] = None) -> requests.Response:
+        with self._slots:
+            return self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+
+    def post(self, path: str, json: Optional[dict] = None) -> requests.Response:
+        with self._slots:
+            return self.session.post(f"{self.base_url}{path}", json=json, timeout=self.timeout)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_clients: dict[str, UmamiClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _connection_info(instance: Umami) -> tuple[str, dict]:
+    if instance.type == UmamiType.cloud:
+        return CLOUD_HOSTNAME, {"x-umami-api-key": instance.api_key}
+    return instance.hostname + "/api", {"Authorization": f"Bearer {instance.bearer_token}"}
+
+
+def get_umami_client(instance: Umami) -> UmamiClient:
+    """
+    Returns the shared client for an instance. A new client replaces the cached
+    one when the hostname or credentials of the instance changed.
+    """
+    base_url, headers = _connection_info(instance)
+    key = str(instance.id)
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client and client.base_url == base_url.rstrip("/") and client.headers == headers:
+            return client
+        if client:
+            client.close()
+        client = UmamiClient(base_url, headers)
+        _clients[key] = client
+        return client
+
+
+def drop_umami_client(instance_id) -> None:
+    with _clients_lock:
+        client = _clients.pop(str(instance_id), None)
+    if client:
+        client.close()
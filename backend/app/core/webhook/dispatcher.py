@@ -0,0 +1,126 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = float(os.getenv("WEBHOOK_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("WEBHOOK_READ_TIMEOUT", "10"))
+# Parallel webhook posts per process, and per destination host.
+MAX_CONCURRENCY = max(1, int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "8")))
+MAX_PER_HOST = max(1, int(os.getenv("WEBHOOK_MAX_PER_HOST", "4")))
+MAX_RETRIES = int(os.getenv("WEBHOOK_MAX_RETRIES", "3"))
+BACKOFF_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_SECONDS", "1"))
+# Upper bound for a single wait, including Retry-After; longer waits give up instead of stalling the job.
+MAX_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_MAX_BACKOFF_SECONDS", "30"))
+
+USER_AGENT = "UmamiSender/1.0 (+https://github.com/ceviixx/umami-sender)"
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class _HostPool:
+    """Keep-alive session for one destination host (scheme + netloc) with its own concurrency cap."""
+
+    def __init__(self):
+        self._slots = threading.BoundedSemaphore(MAX_PER_HOST)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_PER_HOST)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT})
+
+    def post(self, url: str, data: bytes, headers: dict) -> requests.Response:
+        with self._slots:
+            return self.session.post(url, data=data, headers=headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    delay = BACKOFF_SECONDS * (2 ** attempt)
+    return min(MAX_BACKOFF_SECONDS, delay * random.uniform(0.8, 1.2))
+
+
+class WebhookDispatcher:
+    """Posts webhooks over pooled per-host sessions, concurrently and with retries."""
+
+    def __init__(self):
+        self._pools: dict[str, _HostPool] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid = None
+
+    def _pool(self, url: str) -> _HostPool:
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}".lower()
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = _HostPool()
+            return pool
+
+    def post(self, url: str, data: bytes, headers: Optional[dict] = None) -> requests.Response:
+        """
+        Posts the body and retries connection errors, 5xx and 429 with
+        exponential backoff. Retry-After is honoured as long as it stays
+        below WEBHOOK_MAX_BACKOFF_SECONDS.
+        """
+        headers = {"Content-Type": "application/json", **(headers or {})}
+        pool = self._pool(url)
+
+        attempt = 0
+        while True:
+            try:
+                response = pool.post(url, data, headers)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= MAX_RETRIES:
+                    raise
+                time.sleep(_backoff(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code not in RETRY_STATUS or attempt >= MAX_RETRIES:
+                response.raise_for_status()
+                return response
+
+            delay = _retry_after(response)
+            if delay is None:
+                delay = _backoff(attempt)
+            elif delay > MAX_BACKOFF_SECONDS:
+                response.raise_for_status()
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Runs a posting function on the shared executor (at most WEBHOOK_MAX_CONCURRENCY at once)."""
+        with self._lock:
+            # Celery forks its workers; executor threads of the parent do not exist in the child.
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="webhook")
+                self._pools = {}
+                self._pid = os.getpid()
+            executor = self._executor
+        return executor.submit(fn, *args, **kwargs)
+
+
+webhook_dispatcher = WebhookDispatcher()
@@ -1,10 +1,11 @@
-import requests
+import json
 from app.models.webhooks import WebhookRecipient
+from app.core.webhook.dispatcher import webhook_dispatcher
 from app.models.jobs import Job
 from typing import Any
 
-def send_webhook(webhook: WebhookRecipient, summary: dict, job: Job):
-    """Sends a report summary via webhook to the given recipient."""
+def send_webhook(webhook: WebhookRecipient, summary: dict, job: Job, wait: bool = True) -> Any:
+    """Sends a report summary via webhook to the given recipient (wait=False returns a Future)."""
 
     url = webhook.url
     if not url:
@@ -14,20 +15,27 @@ def send_webhook(webhook: WebhookRecipient, summary: dict, job: Job):
     if not summary:
         raise Exception(f"Summary is empty for {webhook.name} ({webhook.type})")
 
+    return post_webhook(webhook, json.dumps(payload).encode("utf-8"), wait=wait)
+
+
+def post_webhook(webhook: WebhookRecipient, body: bytes, wait: bool = True) -> Any:
+    """Posts an already serialized JSON body to the recipient (wait=False returns a Future)."""
+
+    url = webhook.url
+    if not url:
+        raise ValueError(f"skipped|Webhook URL is empty for {webhook.name} ({webhook.type})")
+
+    label = f"{webhook.name} ({webhook.type})"
+    if wait:
+        return _post(url, body, label)
+    return webhook_dispatcher.submit(_post, url, body, label)
+
+
+def _post(url: str, body: bytes, label: str) -> None:
     try:
-        response = requests.post(
-            url,
-            json=payload,
-            headers={
-                "Content-Type": "application/json",
-                "User-Agent": "UmamiSender/1.0 (+https://github.com/ceviixx/umami-sender)"
-            },
-            timeout=10
-        )
-        response.raise_for_status()
-        
+        webhook_dispatcher.post(url, body)
     except Exception as e:
-        raise Exception(f"Webhook failed for {webhook.name} ({webhook.type}): {e}")
+        raise Exception(f"Webhook failed for {label}: {e}")
 
 
 def build_payload(webhook: WebhookRecipient, summary: dict, job: Job) -> dict:
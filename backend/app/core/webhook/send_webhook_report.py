@@ -1,32 +1,80 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
 from sqlalchemy.orm import Session
 from app.models.jobs import Job
 from app.models.webhooks import WebhookRecipient
-from app.core.webhook.send_webhook import send_webhook
-from app.models.template import MailTemplate
+from app.core.webhook.send_webhook import build_payload, post_webhook
+from app.core.template_registry import get_template
 from app.core.render_template import render_template
-from app.utils.response_clean import process_api_response
-import json
+from app.utils.response_clean import process_api_response, value_mappings_version
 
-def send_webhook_report(db: Session, job: Job, summary: dict, webhook: WebhookRecipient):
-    report_type = summary.get("type", "").upper()
-    job_report_type = job.report_type.upper()
-    sender_type = 'WEBHOOK_' + job_report_type + (f'_{report_type}' if report_type else '') + '_' + webhook.type
+WEBHOOK_RENDER_CACHE_SIZE = int(os.getenv("WEBHOOK_RENDER_CACHE_SIZE", "256"))
 
-    template = db.query(MailTemplate).filter_by(type=job.template_type, sender_type=sender_type).first()
-    if not template:
-        raise Exception(f"Template not found for {webhook.name} ({webhook.type})")
-    
-    html_body = render_template(template.content, {
+_bodies: "OrderedDict[tuple, bytes]" = OrderedDict()
+_bodies_lock = threading.Lock()
+
+
+def _summary_hash(summary: dict) -> str:
+    raw = json.dumps(summary, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _render_body(db: Session, job: Job, summary: dict, webhook: WebhookRecipient, template_content: str) -> bytes:
+    html_body = render_template(template_content, {
         "summary": summary,
         "job": job,
     })
     html_body = process_api_response(response=html_body, db=db)
 
     json_body = json.loads(html_body)
-    send_webhook(
-        webhook=webhook, 
-        summary=json_body, 
-        job=job
+    if not json_body:
+        raise Exception(f"Summary is empty for {webhook.name} ({webhook.type})")
+
+    if webhook.type == "DISCORD":
+        # Payload ist das gerenderte JSON selbst, kein erneutes Serialisieren nötig
+        return html_body.encode("utf-8")
+    return json.dumps(build_payload(webhook, json_body, job)).encode("utf-8")
+
+
+def render_webhook_report(db: Session, job: Job, summary: dict, webhook: WebhookRecipient) -> bytes:
+    """Returns the serialized request body for one webhook target."""
+    report_type = summary.get("type", "").upper()
+    job_report_type = job.report_type.upper()
+    sender_type = 'WEBHOOK_' + job_report_type + (f'_{report_type}' if report_type else '') + '_' + webhook.type
+
+    template = get_template(db, job.template_type, sender_type)
+    if not template:
+        raise Exception(f"Template not found for {webhook.name} ({webhook.type})")
+
+    # Webhooks desselben Typs eines Jobs bekommen denselben Body: nur einmal rendern und serialisieren
+    key = (
+        sender_type,
+        template.id,
+        template.source_hash,
+        str(job.id),
+        str(job.updated_at),
+        _summary_hash(summary),
+        value_mappings_version(db),
     )
+    with _bodies_lock:
+        body = _bodies.get(key)
+        if body is not None:
+            _bodies.move_to_end(key)
+
+    if body is None:
+        body = _render_body(db, job, summary, webhook, template.content)
+        with _bodies_lock:
+            _bodies[key] = body
+            while len(_bodies) > WEBHOOK_RENDER_CACHE_SIZE:
+                _bodies.popitem(last=False)
+    return body
+
 
+def send_webhook_report(db: Session, job: Job, summary: dict, webhook: WebhookRecipient, wait: bool = True):
+    body = render_webhook_report(db, job, summary, webhook)
 
+    # wait=False: der Post läuft im Dispatcher, der Aufrufer wartet auf das Future
+    return post_webhook(webhook, body, wait=wait)
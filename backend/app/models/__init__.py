@@ -7,4 +7,6 @@ from .webhooks import WebhookRecipient
 from .value_mappings import ValueMappings
 from .user import User
 from .system_settings import SystemSettings
-from .audit import AuditLog
\ No newline at end of file
+from .audit import AuditLog
+from .delivery_outbox import DeliveryOutbox
+from .delivery_ledger import DeliveryLedger
\ No newline at end of file
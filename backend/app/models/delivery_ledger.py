@@ -0,0 +1,27 @@
+import uuid
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Date, ForeignKey, Index
+from datetime import datetime
+
+from app.database import Base
+
+class DeliveryLedger(Base):
+    __tablename__ = "delivery_ledger"
+    __table_args__ = (
+        Index(
+            "ux_delivery_ledger_entry",
+            "job_id", "run_date", "channel", "target_id", "status", "triggered_by",
+            unique=True,
+        ),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False)
+    run_date = Column(Date, nullable=False, comment="UTC day the run started")
+    channel = Column(String, nullable=False, comment="EMAIL | SLACK | DISCORD | MS_TEAMS | CUSTOM")
+    target_id = Column(String, nullable=False)
+    status = Column(String, nullable=False, comment="success | failed | skipped")
+    triggered_by = Column(String, nullable=False, default="", comment="system | user | ''")
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
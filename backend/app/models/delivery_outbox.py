@@ -0,0 +1,31 @@
+import uuid
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy import Column, String, DateTime, Date, ForeignKey, Integer, LargeBinary, Index
+from datetime import datetime
+
+from app.database import Base
+
+class DeliveryOutbox(Base):
+    __tablename__ = "delivery_outbox"
+    __table_args__ = (
+        Index("ix_delivery_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    job_log_id = Column(UUID(as_uuid=True), ForeignKey("jobs_log.id", ondelete="CASCADE"), nullable=True, index=True)
+    run_date = Column(Date, nullable=False)
+
+    channel = Column(String, nullable=False, comment="EMAIL | SLACK | DISCORD | MS_TEAMS | CUSTOM")
+    target_id = Column(String, nullable=False, comment="senders.id for EMAIL, webhook_recipients.id otherwise")
+    payload = Column(LargeBinary, nullable=False, comment="Rendered mail (without To header) or webhook request body")
+    meta = Column(JSONB, nullable=False, default=dict, comment="e.g. recipients for EMAIL")
+
+    status = Column(String, nullable=False, default="pending", comment="pending | sent | failed")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
@@ -1,6 +1,6 @@
 import uuid, enum
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, ARRAY, Boolean, Time, text
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, ARRAY, Boolean, Time, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 from .base import TimestampMixin
@@ -33,8 +33,11 @@ class Job(Base, TimestampMixin):
     webhook_recipients = Column(ARRAY(UUID(as_uuid=True)), default=[])
     timezone = Column(String, default="Europe/Berlin", comment="Timezone for all reque")
     is_active = Column(Boolean, default=True)
+    next_run_at = Column(DateTime, nullable=True, comment="Next scheduled run in UTC, NULL when inactive, 9999-12-31 when not schedulable")
 
     user = relationship("User", back_populates="jobs")
     host = relationship("Umami", back_populates="mailer_jobs")
     logs = relationship("JobLog", back_populates="job", cascade="all, delete-orphan")
     sender = relationship("Sender")
+
+    __table_args__ = (Index("ix_jobs_is_active_next_run_at", "is_active", "next_run_at"),)
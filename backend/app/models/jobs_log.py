@@ -24,4 +24,5 @@ class JobLog(Base):
     count_success = Column(Integer, nullable=False, default=0)
     count_failed = Column(Integer, nullable=False, default=0)
     count_skipped = Column(Integer, nullable=False, default=0)
+    count_pending = Column(Integer, nullable=False, default=0, server_default="0", comment="Deliveries still waiting in delivery_outbox")
     triggered_by = Column(String, nullable=True)
\ No newline at end of file
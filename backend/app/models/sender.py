@@ -20,5 +20,7 @@ class Sender(Base, TimestampMixin):
     smtp_password = Column(String, nullable=False)
     use_tls = Column(Boolean, default=True)
     use_ssl = Column(Boolean, default=False)
+    recipient_mode = Column(String, nullable=False, default="individual", server_default="individual", comment="individual | bcc | visible")
+    max_recipients_per_message = Column(Integer, nullable=True, comment="Only used when recipient_mode != individual")
 
     user = relationship("User", back_populates="senders")
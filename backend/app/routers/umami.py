@@ -7,6 +7,7 @@ from hashlib import sha256
 import requests
 import os
 from app.utils.responses import send_status_response
+from app.core.umami_client import get_umami_client, drop_umami_client
 
 from app.utils.security import authenticated_user, ensure_is_owner, not_found_response
 from app.models.user import User
@@ -308,6 +309,7 @@ def delete_instance(
 
     db.delete(instance)
     db.commit()
+    drop_umami_client(id)
     return {"detail": "Deleted"}
 
 @router.get("/{id}/websites")
@@ -322,15 +324,8 @@ def get_websites_for_instance(
     
     ensure_is_owner(instance.user_id, user)
 
-    if instance.type == UmamiType.cloud:
-        base_url = os.getenv("CLOUD_HOSTNAME", "https://api.umami.is/v1")
-        headers = {"x-umami-api-key": instance.api_key}
-    else:
-        base_url = instance.hostname + "/api"
-        headers = {"Authorization": f"Bearer {instance.bearer_token}"}
-
     try:
-        response = requests.get(f"{base_url}/websites", headers=headers)
+        response = get_umami_client(instance).get("/websites")
         response.raise_for_status()
         return response.json().get("data", [])
     except Exception as e:
@@ -354,17 +349,10 @@ def get_reports_for_website_id(
     
     ensure_is_owner(instance.user_id, user)
 
-    if instance.type == UmamiType.cloud:
-        base_url = os.getenv("CLOUD_HOSTNAME", "https://api.umami.is/v1")
-        headers = {"x-umami-api-key": instance.api_key}
-    else:
-        base_url = instance.hostname + "/api"
-        headers = {"Authorization": f"Bearer {instance.bearer_token}"}
-
     params = {"website_id": website_id}
 
     try:
-        response = requests.get(f"{base_url}/reports", headers=headers, params=params)
+        response = get_umami_client(instance).get("/reports", params=params)
         response.raise_for_status()
         return response.json().get("data", [])
     except Exception as e:
@@ -1,6 +1,12 @@
 from uuid import UUID
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from typing import Optional
+from enum import Enum
+
+class RecipientMode(str, Enum):
+    individual = "individual"
+    bcc = "bcc"
+    visible = "visible"
 
 class SenderCreate(BaseModel):
     name: str
@@ -11,6 +17,8 @@ class SenderCreate(BaseModel):
     smtp_password: str
     use_tls: bool
     use_ssl: bool
+    recipient_mode: RecipientMode = RecipientMode.individual
+    max_recipients_per_message: Optional[int] = None
 
 class SenderResponse(SenderCreate):
     id: UUID
@@ -27,6 +35,8 @@ class SenderOut(BaseModel):
     smtp_username: str
     use_tls: bool
     use_ssl: bool
+    recipient_mode: RecipientMode = RecipientMode.individual
+    max_recipients_per_message: Optional[int] = None
 
     class Config:
         from_attributes = True 
@@ -43,4 +53,14 @@ class SenderUpdate(BaseModel):
     smtp_username: Optional[str] = None
     smtp_password: Optional[str] = None
     use_tls: Optional[bool] = None
-    use_ssl: Optional[bool] = None
\ No newline at end of file
+    use_ssl: Optional[bool] = None
+    recipient_mode: Optional[RecipientMode] = None
+    max_recipients_per_message: Optional[int] = None
+
+    # Weglassen = unverändert; explizites null wäre für die NOT-NULL-Spalte ein 500
+    @field_validator("recipient_mode")
+    @classmethod
+    def recipient_mode_not_null(cls, v):
+        if v is None:
+            raise ValueError("recipient_mode cannot be null")
+        return v
\ No newline at end of file
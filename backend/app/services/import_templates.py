@@ -13,6 +13,7 @@ from sqlalchemy import select
 from app.database import SessionLocal
 from app.models.template import MailTemplate
 from app.models.system_settings import SystemSettings
+from app.core.template_registry import invalidate_templates
 
 # ======= Defaults (Fallback) =======
 DEFAULT_TEMPLATE_SOURCE = {
@@ -225,6 +226,8 @@ def import_templates_from_repo():
                         stats["skipped"] += 1
 
             db.commit()
+            if stats["inserted"] or stats["updated"]:
+                invalidate_templates()
             stats["finished_at"] = datetime.now(timezone.utc).isoformat()
             print("🎉 Template import done.")
             return stats
@@ -1,9 +1,18 @@
 # app/services/job_logging.py
+import os
+import time
+import uuid
 from contextlib import contextmanager
 from datetime import datetime
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, object_session
 from app.models.jobs_log import JobLog
+from app.core.delivery_ledger import record_delivery, record_deliveries
+
+# Gepufferte Job-Logs: spätestens nach so vielen Läufen bzw. Sekunden wird geschrieben
+JOB_LOG_BATCH_SIZE = int(os.getenv("JOB_LOG_BATCH_SIZE", "100"))
+JOB_LOG_FLUSH_SECONDS = float(os.getenv("JOB_LOG_FLUSH_SECONDS", "5"))
 
 def _aggregate_status_from_details(details: list[str]) -> str:
     if not details:
@@ -17,7 +26,8 @@ def _aggregate_status_from_details(details: list[str]) -> str:
     return "warning"
 
 def add_log_detail(log: JobLog, *, channel: str, target_id: Optional[str], status: str, error: Optional[str] = None) -> None:
-    d = (log.details or [])
+    # Neue Liste, sonst erkennt SQLAlchemy die Änderung am JSONB-Feld nicht
+    d = list(log.details or [])
     d.append({
         "channel": channel,
         "target_id": str(target_id) if target_id is not None else None,
@@ -34,18 +44,113 @@ def add_log_detail(log: JobLog, *, channel: str, target_id: Optional[str], statu
     elif status == "skipped":
         log.count_skipped += 1
 
+    # Ledger für die "heute schon gesendet?"-Prüfung (nur echte Zustellziele)
+    db = object_session(log)
+    if db is not None and channel != "GLOBAL" and target_id is not None:
+        record_delivery(db, job_id=log.job_id, run_date=(log.started_at or datetime.utcnow()).date(),
+                        channel=channel, target_id=target_id, status=status, triggered_by=log.triggered_by)
+
+def finish_pending_detail(log: JobLog, *, channel: str, target_id: Optional[str], status: str, error: Optional[str] = None) -> None:
+    """Trägt das Ergebnis einer Outbox-Zustellung nach und schließt den Lauf ab, sobald nichts mehr offen ist."""
+    add_log_detail(log, channel=channel, target_id=target_id, status=status, error=error)
+    log.count_pending = max(0, (log.count_pending or 0) - 1)
+    if not log.count_pending:
+        log.status = _aggregate_status_from_details(log.details)
+        log.finished_at = datetime.utcnow()
+
+class JobLogWriter:
+    """
+    Sammelt fertige Job-Logs im Speicher und schreibt sie gebündelt: ein
+    INSERT (executemany) für alle Logs plus deren Ledger-Einträge und ein
+    Commit pro Flush statt eines Commits pro Job.
+    """
+
+    def __init__(self, db: Session, batch_size: int = JOB_LOG_BATCH_SIZE, flush_seconds: float = JOB_LOG_FLUSH_SECONDS):
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self._logs: list[JobLog] = []
+        self._last_flush = time.monotonic()
+
+    def add(self, log: JobLog) -> None:
+        self._logs.append(log)
+        if len(self._logs) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self) -> None:
+        logs, self._logs = self._logs, []
+        self._last_flush = time.monotonic()
+        if logs:
+            self.db.execute(insert(JobLog), [_log_row(log) for log in logs])
+            record_deliveries(self.db, [entry for log in logs for entry in _ledger_entries(log)])
+        # Commit auch ohne Logs: Outbox-Zeilen o.ä. der Session gehören zum selben Schritt
+        self.db.commit()
+
+    def __enter__(self) -> "JobLogWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            if exc is None:
+                raise
+            # Den ursprünglichen Fehler nicht verdecken
+            print(f"⚠️  Job logs could not be written: {e}")
+
+
+def _log_row(log: JobLog) -> dict:
+    return {
+        "id": log.id,
+        "job_id": log.job_id,
+        "started_at": log.started_at,
+        "finished_at": log.finished_at,
+        "status": log.status,
+        "details": log.details,
+        "count_success": log.count_success,
+        "count_failed": log.count_failed,
+        "count_skipped": log.count_skipped,
+        "count_pending": log.count_pending,
+        "triggered_by": log.triggered_by,
+    }
+
+
+def _ledger_entries(log: JobLog) -> list[dict]:
+    run_date = log.started_at.date()
+    return [
+        {
+            "job_id": log.job_id,
+            "run_date": run_date,
+            "channel": d["channel"],
+            "target_id": d["target_id"],
+            "status": d["status"],
+            "triggered_by": log.triggered_by or "",
+        }
+        for d in (log.details or [])
+        if d.get("channel") != "GLOBAL" and d.get("target_id") is not None
+    ]
+
+
 from typing import Generator
 @contextmanager
-def job_log_context(db: Session, *, job_id, triggered_by: str = None) -> Generator[JobLog, None, None]:
-    log = JobLog(job_id=job_id, started_at=datetime.utcnow(), status="running", details=[], triggered_by=triggered_by)
-    db.add(log)
-    db.flush()  # ID verfügbar
+def job_log_context(db: Session, *, job_id, triggered_by: str = None, writer: Optional[JobLogWriter] = None) -> Generator[JobLog, None, None]:
+    """
+    Ohne writer wird der Log sofort angelegt und am Ende committet. Mit writer
+    bleibt er bis zum Ende im Speicher und wird gebündelt geschrieben.
+    """
+    log = JobLog(
+        id=uuid.uuid4(), job_id=job_id, started_at=datetime.utcnow(), status="running", details=[],
+        count_success=0, count_failed=0, count_skipped=0, count_pending=0, triggered_by=triggered_by,
+    )
+    if writer is None:
+        db.add(log)
+        db.flush()  # ID verfügbar
 
     try:
         yield log
 
-        # Status aus Details verdichten
-        log.status = _aggregate_status_from_details(log.details)
+        # Status aus Details verdichten; offene Outbox-Zustellungen halten den Lauf auf "queued"
+        log.status = "queued" if log.count_pending else _aggregate_status_from_details(log.details)
     except Exception as e:
         # Unerwarteter Fehler auf Run-Ebene
         add_log_detail(log, channel="GLOBAL", target_id=None, status="failed", error=str(e))
@@ -53,4 +158,7 @@ def job_log_context(db: Session, *, job_id, triggered_by: str = None) -> Generat
         raise
     finally:
         log.finished_at = datetime.utcnow()
-        db.commit()
+        if writer is None:
+            db.commit()
+        else:
+            writer.add(log)
@@ -1,10 +1,54 @@
+import os
+import threading
+import time
+from sqlalchemy import func, literal
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.orm import Session
 from app.models.value_mappings import ValueMappings
-from typing import Any
+from typing import Any, Optional
+
+# How often a process checks the value_mappings table for changes.
+CHECK_INTERVAL_SECONDS = float(os.getenv("VALUE_MAPPINGS_CHECK_SECONDS", "60"))
+
+_replace_map: Optional[dict[str, str]] = None
+_version: Optional[tuple] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+def _table_version(db: Session) -> tuple:
+    entry = ValueMappings.type + literal(":") + ValueMappings.key + literal("=") + ValueMappings.value
+    count, digest = db.query(
+        func.count(ValueMappings.id),
+        func.md5(func.string_agg(entry, aggregate_order_by(literal(","), ValueMappings.id))),
+    ).one()
+    return count, digest
+
+def _load(db: Session) -> None:
+    global _replace_map, _version, _checked_at
+    now = time.monotonic()
+    if _replace_map is not None and now - _checked_at < CHECK_INTERVAL_SECONDS:
+        return
+
+    version = _table_version(db)
+    if _replace_map is not None and version == _version:
+        _checked_at = now
+        return
+
+    replace_map = {key: value for key, value in db.query(ValueMappings.key, ValueMappings.value).all()}
+
+    with _lock:
+        _replace_map = replace_map
+        _version = version
+        _checked_at = now
 
 def get_replace_map(db: Session) -> dict[str, str]:
-    mappings = db.query(ValueMappings).all()
-    return {entry.key: entry.value for entry in mappings}
+    _load(db)
+    return _replace_map
+
+def value_mappings_version(db: Session) -> Optional[tuple]:
+    """Version of the currently loaded mappings; changes whenever the table changed."""
+    _load(db)
+    return _version
 
 def clean_value(value: Any, replace_map: dict[str, str]) -> Any:
     if isinstance(value, str) and value in replace_map:
@@ -12,14 +56,17 @@ def clean_value(value: Any, replace_map: dict[str, str]) -> Any:
     return value
 
 def recursive_cleanup(obj: Any, replace_map: dict[str, str]) -> Any:
-    if isinstance(obj, dict):
+    if isinstance(obj, str):
+        return replace_map.get(obj, obj)
+    elif isinstance(obj, dict):
+        # Dict-Werte werden wie bisher zweimal übersetzt, damit verkettete Mappings (A→B, B→C) gleich bleiben
         return {k: recursive_cleanup(clean_value(v, replace_map), replace_map) for k, v in obj.items()}
     elif isinstance(obj, list):
         return [recursive_cleanup(item, replace_map) for item in obj]
     else:
-        return clean_value(obj, replace_map)
+        return obj
 
 def process_api_response(response: Any, db: Session):
     replace_map = get_replace_map(db)
     cleaned = recursive_cleanup(response, replace_map)
-    return cleaned
\ No newline at end of file
+    return cleaned
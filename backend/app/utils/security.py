@@ -1,16 +1,33 @@
 from jose import jwt, JWTError
 from app.database import SessionLocal
 from app.models.user import User
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from sqlalchemy.orm.attributes import set_committed_value
 from app.database import get_db
 from app.utils.responses import send_status_response
+from collections import OrderedDict
+from typing import Optional
 import os
+import threading
+import time
 
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret")
 ALGORITHM = "HS256"
 
+# Column values of recently authenticated users (without the password hash), keyed by the token subject.
+# Changes made on another worker process become visible after at most the TTL; 0 disables the cache.
+# Granting admin rights always re-reads the role (_current_role).
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+
+_users: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+_users_lock = threading.Lock()
+# Nicht im Cache und nicht in scope["state"]; wird bei Bedarf nachgeladen (update_password)
+_UNCACHED_COLUMNS = {"password"}
+
 
 _bearer = HTTPBearer(auto_error=True)
 
@@ -23,24 +40,116 @@ def _decode(token: str) -> dict:
             detail="Invalid or expired token"
         )
 
-# --- Basis-Dependencies ------------------------------------------------------
+# --- User-Cache ---------------------------------------------------------------
 
-def authenticated_user(
-    creds: HTTPAuthorizationCredentials = Depends(_bearer),
-    db: Session = Depends(get_db),
-) -> User:
-    payload = _decode(creds.credentials)
-    user_id = payload.get("sub")
+def _subject(payload: dict) -> str:
+    user_id = payload.get("sub") or payload.get("user_id")
     if not user_id:
         raise HTTPException(status_code=401, detail="Token missing subject")
+    return str(user_id)
+
+
+def _cached_user(sub: str) -> Optional[dict]:
+    if USER_CACHE_TTL_SECONDS <= 0:
+        return None
+    with _users_lock:
+        entry = _users.get(sub)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _users[sub]
+            return None
+        _users.move_to_end(sub)
+        return entry[1]
+
+
+def _remember_user(sub: str, user: User) -> dict:
+    values = {
+        attr.key: getattr(user, attr.key)
+        for attr in sa_inspect(User).column_attrs
+        if attr.key not in _UNCACHED_COLUMNS
+    }
+    if USER_CACHE_TTL_SECONDS > 0:
+        with _users_lock:
+            _users[sub] = (time.monotonic() + USER_CACHE_TTL_SECONDS, values)
+            _users.move_to_end(sub)
+            while len(_users) > USER_CACHE_SIZE:
+                _users.popitem(last=False)
+    return values
+
+
+def invalidate_user_cache(user_id=None) -> None:
+    """Drops one cached user (after an update or delete) or the whole cache of this process."""
+    with _users_lock:
+        if user_id is None:
+            _users.clear()
+        else:
+            _users.pop(str(user_id), None)
+
+
+def cached_user_for_token(token: str) -> Optional[dict]:
+    """Cached column values for a valid token, or None (invalid token or cache miss). No DB access."""
+    try:
+        return _cached_user(_subject(_decode(token)))
+    except HTTPException:
+        return None
 
-    user = db.query(User).filter(User.id == user_id).first()
+
+def resolve_user_values(token: str, db: Session) -> dict:
+    """Column values of the token's user; only a cache miss runs the SELECT."""
+    sub = _subject(_decode(token))
+    values = _cached_user(sub)
+    if values is not None:
+        return values
+
+    user = db.query(User).filter(User.id == sub).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return _remember_user(sub, user)
+
+
+def attach_user(values: dict, db: Session) -> User:
+    """
+    Builds a persistent User in db from cached values without querying (changes
+    on it are flushed as usual). Columns missing from values, like the password
+    hash, are loaded on first access.
+    """
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+# --- Basis-Dependencies ------------------------------------------------------
+
+def authenticated_user(
+    request: Request,
+    creds: HTTPAuthorizationCredentials = Depends(_bearer),
+    db: Session = Depends(get_db),
+) -> User:
+    # Von der AuditMiddleware für genau diesen Token bereits aufgelöst
+    state = request.scope.get("state") or {}
+    values = state.get("auth_user")
+    if values is not None and state.get("auth_token") == creds.credentials:
+        return attach_user(values, db)
+    return load_user_from_token(creds.credentials, db)
+
+def _current_role(user: User) -> Optional[str]:
+    """
+    The user's role as stored right now. The cached role may be up to
+    USER_CACHE_TTL_SECONDS old on other processes, so admin rights are
+    re-checked against the database (None if the user no longer exists).
+    """
+    db = object_session(user)
+    if db is None:
+        return user.role
+    role = db.query(User.role).filter(User.id == user.id).scalar()
+    if role != user.role:
+        invalidate_user_cache(user.id)
+        if role is not None:
+            set_committed_value(user, "role", role)
+    return role
 
 def authenticated_admin(user: User = Depends(authenticated_user)) -> User:
-    if user.role != "admin":
+    if user.role != "admin" or _current_role(user) != "admin":
         raise HTTPException(status_code=403, detail="Admin privileges required")
     return user
 
@@ -51,13 +160,13 @@ def ensure_is_owner(owner_id: str | int, user: User) -> None:
         raise HTTPException(status_code=403, detail="Forbidden (owner only)")
 
 def ensure_is_admin(user: User) -> None:
-    if user.role != "admin":
+    if user.role != "admin" or _current_role(user) != "admin":
         raise HTTPException(status_code=403, detail="Forbidden (admin only)")
 
 def ensure_is_owner_or_admin(owner_id: str | int, user: User) -> None:
-    if user.role == "admin":
+    if str(user.id) == str(owner_id):
         return
-    if str(user.id) != str(owner_id):
+    if user.role != "admin" or _current_role(user) != "admin":
         raise HTTPException(status_code=403, detail="Forbidden (owner or admin)")
     
 
@@ -87,12 +196,4 @@ def not_found_response(model, object_id: str | int, *, action: str | None = None
     )
 
 def load_user_from_token(token: str, db: Session) -> User:
-    payload = _decode(token)
-    user_id = payload.get("sub") or payload.get("user_id")
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Token missing subject")
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
\ No newline at end of file
+    return attach_user(resolve_user_values(token, db), db)
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Requests per second through AuditMiddleware with a slow user lookup.
+
+The user lookup is replaced by a sleep (simulated SELECT round trip) and the
+audit sink by a no-op, so no database is needed. Two modes:
+
+    inline   the lookup blocks the event loop (behaviour before AUDIT_DB_THREADS)
+    offloop  the lookup runs on the middleware's own thread pool (current)
+
+Run from backend/:
+
+    DATABASE_URL=postgresql+psycopg2://u:p@localhost/x PYTHONPATH=. \\
+        python scripts/bench_audit_middleware.py [--requests 400] [--concurrency 50] [--db-ms 5]
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import Executor, Future
+
+import app.audit.audit_api_middleware as audit_mw
+from app.audit.audit_sink import audit_sink
+
+
+class _InlineExecutor(Executor):
+    """Runs the submitted function immediately on the calling thread, i.e. on the event loop."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+async def _endpoint(scope, receive, send):
+    await asyncio.sleep(0.002)  # async I/O in the route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def _run(mw, requests: int, concurrency: int) -> float:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with slots:
+            scope = {
+                "type": "http", "path": "/dashboard", "method": "GET", "query_string": b"",
+                # Kein gültiges JWT: am User-Cache vorbei, jeder Request macht den Lookup
+                "headers": [(b"authorization", b"Bearer benchmark")],
+            }
+
+            async def receive():
+                return {"type": "http.request"}
+
+            async def send(message):
+                pass
+
+            await mw(scope, receive, send)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--db-ms", type=float, default=5, help="simulated duration of the user SELECT")
+    args = parser.parse_args()
+
+    audit_sink.enqueue = lambda row: None
+    audit_sink._write = lambda batch: None
+
+    def slow_lookup(self, token):
+        time.sleep(args.db_ms / 1000)
+        return {"id": "benchmark", "username": "benchmark", "role": "admin"}
+
+    audit_mw.AuditMiddleware._load_user_for_mw = slow_lookup
+
+    for mode in ("inline", "offloop"):
+        mw = audit_mw.AuditMiddleware(_endpoint, db_session_factory=None)
+        if mode == "inline":
+            mw._db_executor = _InlineExecutor()
+        rps = asyncio.run(_run(mw, args.requests, args.concurrency))
+        print(f"{mode:8} {rps:8.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
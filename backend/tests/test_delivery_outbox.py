@@ -0,0 +1,102 @@
+from concurrent.futures import Future
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import delivery_outbox
+from app.core.email import send_email
+from app.core.email.delivery import RecipientsRefused
+
+NOW = datetime(2026, 3, 10, 6, 0)
+
+
+class FakeEngine:
+    """Records every SMTP transaction; addresses in `refuse` are refused by the server."""
+
+    def __init__(self, refuse=()):
+        self.refuse = set(refuse)
+        self.sent: list[list[str]] = []
+
+    def submit(self, account, to_addrs, msg):
+        to_addrs = [to_addrs] if isinstance(to_addrs, str) else list(to_addrs)
+        self.sent.append(to_addrs)
+        future = Future()
+        refused = [r for r in to_addrs if r in self.refuse]
+        if refused:
+            future.set_exception(RecipientsRefused(refused))
+        else:
+            future.set_result(None)
+        return future
+
+
+def _sender(recipient_mode="individual"):
+    return SimpleNamespace(
+        id="sender-1", email="reports@example.com", smtp_host="smtp.example.com", smtp_port=587,
+        smtp_username=None, smtp_password=None, use_tls=False, use_ssl=False,
+        recipient_mode=recipient_mode, max_recipients_per_message=None,
+    )
+
+
+def _row(recipients):
+    return SimpleNamespace(
+        channel="EMAIL", target_id="sender-1", payload=b"Subject: report\r\n\r\nhi",
+        meta={"recipients": list(recipients)}, attempts=0, status="pending",
+        next_attempt_at=NOW, last_error=None, sent_at=None, job_log_id=None,
+    )
+
+
+def _drain_once(row, senders):
+    row.attempts += 1
+    error, failed = delivery_outbox._wait(delivery_outbox._submit(row, senders, {}))
+    delivery_outbox._record(None, row, error, NOW, failed)
+
+
+@pytest.mark.parametrize("mode", ["individual", "bcc"])
+def test_retry_only_sends_to_failed_recipients(monkeypatch, mode):
+    senders = {"sender-1": _sender(mode)}
+    row = _row(["ok@example.com", "bad@example.com"])
+
+    engine = FakeEngine(refuse={"bad@example.com"})
+    monkeypatch.setattr(send_email, "delivery_engine", engine)
+    _drain_once(row, senders)
+
+    assert row.status == "pending"
+    assert row.meta["recipients"] == ["bad@example.com"]
+    assert row.meta["delivered"] == ["ok@example.com"]
+
+    retry = FakeEngine()
+    monkeypatch.setattr(send_email, "delivery_engine", retry)
+    _drain_once(row, senders)
+
+    assert [r for transaction in retry.sent for r in transaction] == ["bad@example.com"]
+    assert row.status == "sent"
+
+
+def test_failed_transaction_keeps_all_its_recipients(monkeypatch):
+    senders = {"sender-1": _sender("bcc")}
+    row = _row(["a@example.com", "b@example.com"])
+
+    class Down(FakeEngine):
+        def submit(self, account, to_addrs, msg):
+            future = Future()
+            future.set_exception(ConnectionRefusedError("smtp down"))
+            return future
+
+    monkeypatch.setattr(send_email, "delivery_engine", Down())
+    _drain_once(row, senders)
+
+    assert row.status == "pending"
+    assert row.meta["recipients"] == ["a@example.com", "b@example.com"]
+
+
+def test_gives_up_after_max_attempts(monkeypatch):
+    senders = {"sender-1": _sender()}
+    row = _row(["bad@example.com"])
+    row.attempts = delivery_outbox.OUTBOX_MAX_ATTEMPTS - 1
+
+    monkeypatch.setattr(send_email, "delivery_engine", FakeEngine(refuse={"bad@example.com"}))
+    _drain_once(row, senders)
+
+    assert row.status == "failed"
+    assert "bad@example.com" in row.last_error
@@ -0,0 +1,145 @@
+from datetime import datetime, time, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.jobs import Frequency
+from app.core.scheduling import (
+    MISSED_RUN_TOLERANCE,
+    SCHEDULE_GRACE,
+    UNSCHEDULABLE,
+    advance_next_run_at,
+    compute_next_run_at,
+    is_missed_run,
+    refresh_next_run_at,
+)
+
+
+def _job(frequency, day=None, execution_time=time(6, 0), is_active=True, timezone="Europe/Berlin"):
+    return SimpleNamespace(
+        id="job-1", name="test", frequency=frequency, day=day,
+        execution_time=execution_time, is_active=is_active, timezone=timezone, next_run_at=None,
+    )
+
+
+# --- daily ---------------------------------------------------------------------
+
+def test_daily_later_today():
+    assert compute_next_run_at(Frequency.daily, None, time(6, 0), datetime(2026, 3, 10, 5, 0)) == datetime(2026, 3, 10, 6, 0)
+
+
+def test_daily_exactly_at_execution_time():
+    assert compute_next_run_at(Frequency.daily, None, time(6, 0), datetime(2026, 3, 10, 6, 0)) == datetime(2026, 3, 10, 6, 0)
+
+
+def test_daily_rolls_over_month_and_year_end():
+    assert compute_next_run_at(Frequency.daily, None, time(6, 0), datetime(2026, 1, 31, 7, 0)) == datetime(2026, 2, 1, 6, 0)
+    assert compute_next_run_at(Frequency.daily, None, time(0, 0), datetime(2026, 12, 31, 23, 59)) == datetime(2027, 1, 1, 0, 0)
+
+
+def test_execution_time_as_string():
+    assert compute_next_run_at(Frequency.daily, None, "06:30:00", datetime(2026, 3, 10, 5, 0)) == datetime(2026, 3, 10, 6, 30)
+
+
+# --- weekly --------------------------------------------------------------------
+
+def test_weekly_same_day_before_and_after_time():
+    tuesday = datetime(2026, 3, 10, 5, 0)
+    assert tuesday.weekday() == 1
+    assert compute_next_run_at(Frequency.weekly, 1, time(6, 0), tuesday) == datetime(2026, 3, 10, 6, 0)
+    assert compute_next_run_at(Frequency.weekly, 1, time(6, 0), tuesday.replace(hour=7)) == datetime(2026, 3, 17, 6, 0)
+
+
+def test_weekly_across_month_end():
+    # Thursday 2026-04-30 -> next Monday is 2026-05-04
+    assert compute_next_run_at(Frequency.weekly, 0, time(6, 0), datetime(2026, 4, 30, 12, 0)) == datetime(2026, 5, 4, 6, 0)
+
+
+@pytest.mark.parametrize("day", [None, -1, 7])
+def test_weekly_invalid_day(day):
+    assert compute_next_run_at(Frequency.weekly, day, time(6, 0), datetime(2026, 3, 10)) is None
+
+
+# --- monthly -------------------------------------------------------------------
+
+def test_monthly_later_this_month():
+    assert compute_next_run_at(Frequency.monthly, 15, time(6, 0), datetime(2026, 3, 10)) == datetime(2026, 3, 15, 6, 0)
+
+
+def test_monthly_day_31_runs_on_last_day_of_short_months():
+    assert compute_next_run_at(Frequency.monthly, 31, time(6, 0), datetime(2026, 2, 1)) == datetime(2026, 2, 28, 6, 0)
+    assert compute_next_run_at(Frequency.monthly, 31, time(6, 0), datetime(2028, 2, 1)) == datetime(2028, 2, 29, 6, 0)
+    assert compute_next_run_at(Frequency.monthly, 31, time(6, 0), datetime(2026, 4, 1)) == datetime(2026, 4, 30, 6, 0)
+
+
+def test_monthly_after_last_day_moves_to_next_month():
+    assert compute_next_run_at(Frequency.monthly, 31, time(6, 0), datetime(2026, 2, 28, 7, 0)) == datetime(2026, 3, 31, 6, 0)
+    assert compute_next_run_at(Frequency.monthly, 30, time(6, 0), datetime(2026, 1, 30, 7, 0)) == datetime(2026, 2, 28, 6, 0)
+
+
+def test_monthly_across_year_end():
+    assert compute_next_run_at(Frequency.monthly, 1, time(6, 0), datetime(2026, 12, 1, 7, 0)) == datetime(2027, 1, 1, 6, 0)
+
+
+@pytest.mark.parametrize("day", [None, 0, 32])
+def test_monthly_invalid_day(day):
+    assert compute_next_run_at(Frequency.monthly, day, time(6, 0), datetime(2026, 3, 10)) is None
+
+
+def test_missing_execution_time_and_unsupported_frequency():
+    assert compute_next_run_at(Frequency.daily, None, None, datetime(2026, 3, 10)) is None
+    assert compute_next_run_at(Frequency.yearly, 1, time(6, 0), datetime(2026, 3, 10)) is None
+
+
+# --- timezones -----------------------------------------------------------------
+
+@pytest.mark.parametrize("timezone", ["Europe/Berlin", "America/New_York", "Asia/Tokyo", "UTC"])
+def test_execution_time_is_utc_regardless_of_job_timezone(timezone):
+    # The job timezone only applies to the Umami queries; execution_time is stored in UTC.
+    job = _job(Frequency.daily, execution_time=time(23, 30), timezone=timezone)
+    refresh_next_run_at(job, now=datetime(2026, 3, 29, 12, 0))
+    assert job.next_run_at == datetime(2026, 3, 29, 23, 30)
+
+
+def test_daylight_saving_change_does_not_shift_utc_schedule():
+    # Europe/Berlin switches to summer time on 2026-03-29; the UTC schedule stays 06:00.
+    job = _job(Frequency.daily, execution_time=time(6, 0))
+    advance_next_run_at(job, datetime(2026, 3, 28, 6, 0))
+    assert job.next_run_at == datetime(2026, 3, 29, 6, 0)
+    advance_next_run_at(job, job.next_run_at)
+    assert job.next_run_at == datetime(2026, 3, 30, 6, 0)
+
+
+# --- refresh / advance ---------------------------------------------------------
+
+def test_refresh_keeps_run_due_within_grace():
+    job = _job(Frequency.daily, execution_time=time(6, 0))
+    refresh_next_run_at(job, now=datetime(2026, 3, 10, 6, 0) + SCHEDULE_GRACE - timedelta(seconds=1))
+    assert job.next_run_at == datetime(2026, 3, 10, 6, 0)
+
+
+def test_advance_moves_past_now():
+    job = _job(Frequency.weekly, day=1)
+    advance_next_run_at(job, datetime(2026, 3, 10, 6, 0))
+    assert job.next_run_at == datetime(2026, 3, 17, 6, 0)
+
+
+def test_inactive_job_has_no_next_run():
+    job = _job(Frequency.daily, is_active=False)
+    refresh_next_run_at(job, now=datetime(2026, 3, 10))
+    assert job.next_run_at is None
+
+
+def test_unschedulable_job_gets_sentinel():
+    job = _job(Frequency.weekly, day=None)
+    refresh_next_run_at(job, now=datetime(2026, 3, 10))
+    assert job.next_run_at == UNSCHEDULABLE
+    advance_next_run_at(job, datetime(2026, 3, 10))
+    assert job.next_run_at == UNSCHEDULABLE
+
+
+def test_missed_runs_are_detected():
+    now = datetime(2026, 3, 10, 6, 0)
+    assert not is_missed_run(now, now)
+    assert not is_missed_run(now - MISSED_RUN_TOLERANCE, now)
+    assert is_missed_run(now - MISSED_RUN_TOLERANCE - timedelta(seconds=1), now)
@@ -1,5 +1,7 @@
-from celery import Celery
+import os
+from celery import Celery, signals
 from celery.schedules import crontab
+from kombu import Queue
 
 from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
@@ -7,12 +9,31 @@ from datetime import datetime
 from app.database import engine
 import app.audit.celery_audit
 
-app = Celery("UmamiSender", broker="redis://redis:6379/0")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+# Per-job report runs go to their own queue so they can be scaled with
+# dedicated workers (celery worker -Q jobs) without delaying the beat tasks.
+JOBS_QUEUE = os.getenv("JOBS_QUEUE", "jobs")
+# Outbox deliveries (DELIVERY_OUTBOX_ENABLED) are drained on their own queue.
+DELIVERY_QUEUE = os.getenv("DELIVERY_QUEUE", "deliveries")
+# Worker processes per node; unset = number of CPUs.
+WORKER_CONCURRENCY = int(os.getenv("CELERY_WORKER_CONCURRENCY", "0")) or None
+# How long a claimed job run stays locked while running / stays marked as done.
+JOB_RUN_LOCK_SECONDS = int(os.getenv("JOB_RUN_LOCK_SECONDS", "1800"))
+JOB_RUN_DONE_SECONDS = int(os.getenv("JOB_RUN_DONE_SECONDS", "86400"))
+
+app = Celery("UmamiSender", broker=REDIS_URL)
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 app.conf.update(
     imports=("app.audit.celery_audit", "tasks.worker"),
+    task_queues=(Queue("celery"), Queue(JOBS_QUEUE), Queue(DELIVERY_QUEUE)),
+    task_routes={
+        "tasks.worker.run_jobs": {"queue": JOBS_QUEUE},
+        "tasks.worker.drain_delivery_outbox": {"queue": DELIVERY_QUEUE},
+    },
+    worker_concurrency=WORKER_CONCURRENCY,
+    worker_prefetch_multiplier=1,
 )
 
 app.conf.beat_schedule = {
@@ -35,10 +56,111 @@ app.conf.beat_schedule = {
 }
 
 
-from app.core.jobs import run_due_jobs
+from datetime import date
+from redis import Redis, RedisError
+from app.core.jobs import claim_due_jobs, run_scheduled_jobs
+from app.core.email.smtp_pool import smtp_pool
+from app.core import delivery_outbox
+
+# Outbox-Tasks nur einplanen, wenn die Outbox aktiv ist (sonst jede Minute eine leere SKIP-LOCKED-Abfrage)
+if delivery_outbox.OUTBOX_ENABLED:
+    app.conf.beat_schedule.update({
+        "drain-delivery-outbox-every-minute": {
+            "task": "tasks.worker.drain_delivery_outbox",
+            "schedule": crontab(minute="*/1"),
+        },
+        "purge-delivery-outbox-daily": {
+            "task": "tasks.worker.purge_delivery_outbox",
+            "schedule": crontab(minute=30, hour=0),
+        },
+    })
+
+@signals.worker_process_shutdown.connect
+def _close_smtp_connections(**_):
+    smtp_pool.close_all()
+
+_redis = None
+
+def _get_redis() -> Redis:
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(REDIS_URL)
+    return _redis
+
+def _run_key(job_id: str, scheduled_for: str) -> str:
+    return f"umamisender:job-run:{job_id}:{scheduled_for}"
+
+def _acquire_run(key: str) -> bool:
+    try:
+        return bool(_get_redis().set(key, "running", nx=True, ex=JOB_RUN_LOCK_SECONDS))
+    except RedisError:
+        # Without Redis we can't dedupe; the per-day JobLog checks still apply.
+        return True
+
+def _finish_run(key: str, done: bool) -> None:
+    try:
+        if done:
+            _get_redis().set(key, "done", ex=JOB_RUN_DONE_SECONDS)
+        else:
+            _get_redis().delete(key)
+    except RedisError:
+        pass
+
 @app.task(name="tasks.worker.check_and_run_jobs")
 def check_and_run_jobs():
-    run_due_jobs()
+    claimed = claim_due_jobs()
+    for group in claimed:
+        first = group["runs"][0]
+        run_jobs.apply_async(
+            kwargs=group,
+            queue=JOBS_QUEUE,
+            task_id=_run_key(first["job_id"], first["scheduled_for"]),
+        )
+    if claimed:
+        jobs_count = sum(len(group["runs"]) for group in claimed)
+        print(f"📬 Enqueued {jobs_count} job run(s) in {len(claimed)} task(s) on '{JOBS_QUEUE}'")
+
+@app.task(name="tasks.worker.run_jobs", acks_late=True)
+def run_jobs(runs: list[dict], run_date: str):
+    """Runs a group of due jobs that share one report summary."""
+    keys = {}
+    for run in runs:
+        key = _run_key(run["job_id"], run["scheduled_for"])
+        if _acquire_run(key):
+            keys[run["job_id"]] = key
+        else:
+            print(f"⏭️  Job run {key} already handled, skipping")
+
+    if not keys:
+        return
+
+    try:
+        run_scheduled_jobs(list(keys.keys()), date.fromisoformat(run_date))
+    except Exception:
+        for key in keys.values():
+            _finish_run(key, done=False)
+        raise
+    for key in keys.values():
+        _finish_run(key, done=True)
+
+    if delivery_outbox.OUTBOX_ENABLED:
+        drain_delivery_outbox.apply_async(queue=DELIVERY_QUEUE)
+
+@app.task(name="tasks.worker.drain_delivery_outbox")
+def drain_delivery_outbox():
+    """Sends everything that is due in delivery_outbox (retries included)."""
+    if not delivery_outbox.OUTBOX_ENABLED:
+        return
+    sent = delivery_outbox.drain_outbox()
+    if sent:
+        print(f"📤 Processed {sent} outbox deliveries")
+
+@app.task(name="tasks.worker.purge_delivery_outbox")
+def purge_delivery_outbox(retention_days: int | None = None) -> int:
+    days = retention_days or 7
+    deleted = delivery_outbox.purge_delivery_outbox(days)
+    print(f"🧹 purge_delivery_outbox: deleted={deleted}, days={days}")
+    return deleted
 
 from app.core.instance_health import check_all_instances_health
 @app.task(name="tasks.worker.check_instances_health")